@@ -1,8 +1,20 @@
 from .advanced_quantum_walk import AdvancedQuantumWalk
 from .entangled_quantum_walk import EntangledQuantumWalk
+from .history import HistoryRecorder
 from .multidimensional_quantum_walk import MultiDimensionalQuantumWalk
-from quantum_ml import QuantumSimulator, QMLInterface
-from .quantum_walk_gui import QuantumWalkGUI
-from quantum_walk_network import QuantumWalkOnNetwork, IntegratedQuantumWalk
+from .quantum_walk_network import QuantumWalkOnNetwork, IntegratedQuantumWalk
 from .quantum_walk import QuantumWalk
-#from visualizations #no classes yet
\ No newline at end of file
+from .quantum_walk_batch import QuantumWalkBatch
+from .spectral_cache import SpectralCache
+from .trajectories import TrajectoryEnsemble
+#from visualizations #no classes yet
+
+# The machine-learning interface needs qiskit and the GUI needs tkinter; both are optional
+try:
+    from .quantum_ml import QuantumSimulator, QMLInterface
+except ImportError:
+    pass
+try:
+    from .quantum_walk_gui import QuantumCoinGUI
+except ImportError:
+    pass
@@ -1,36 +1,32 @@
 import numpy as np
 import networkx as nx
-
-class AdvancedQuantumWalk:
-    def __init__(self, num_positions, start_positions, dimension=1, topology='line', coin_type='Hadamard'):
+from .coins import apply_coin_field, coin_matrix
+from .stepping import StepIteratorMixin
+from .utils import complex_dtype, graph_seed, support_bounds
+
+class AdvancedQuantumWalk(StepIteratorMixin):
+    def __init__(self, num_positions, start_positions, dimension=1, topology='line', coin_type='Hadamard', seed=None, dtype=complex):
+        self.rng = np.random.default_rng(seed)
+        self.dtype = complex_dtype(dtype)
         self.dimension = dimension
         self.topology = topology
         self.coin_type = coin_type
+        # The rate passed to apply_decoherence by step(), also inside an active window
+        self.decoherence_rate = 0.01
+        self.window_epsilon = None
+        self.active_window = None
         if topology == 'network':
-            self.graph = nx.random_regular_graph(3, num_positions)
-            self.position_states = np.zeros((2, nx.number_of_nodes(self.graph)), dtype=complex)
+            self.graph = nx.random_regular_graph(3, num_positions, seed=graph_seed(self.rng))
+            self.position_states = np.zeros((2, nx.number_of_nodes(self.graph)), dtype=self.dtype)
         else:
-            self.position_states = np.zeros((2, *([num_positions] * dimension)), dtype=complex)
+            self.position_states = np.zeros((2, *([num_positions] * dimension)), dtype=self.dtype)
 
         # Initialize multiple start positions for multi-particle walks
         for start_position in start_positions:
             self.position_states[0, start_position] = 1 / np.sqrt(len(start_positions))
 
     def apply_coin(self):
-        H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)  # Hadamard coin
-        G = 2 * np.full((2, 2), 1/2) - np.eye(2)      # Grover coin
-        F = np.array([[1, 1], [1, -1j]]) / np.sqrt(2) # Fourier coin
-
-        if self.coin_type == 'Hadamard':
-            coin = H
-        elif self.coin_type == 'Grover':
-            coin = G
-        elif self.coin_type == 'Fourier':
-            coin = F
-        else:
-            raise ValueError("Unsupported coin type")
-
-        self.position_states = np.apply_along_axis(lambda x: np.dot(coin, x), 0, self.position_states)
+        self.position_states = apply_coin_field(coin_matrix(self.coin_type), self.position_states)
 
     def shift(self):
         if self.topology == 'line' or self.topology == 'grid':
@@ -44,25 +40,69 @@ class AdvancedQuantumWalk:
 
     def apply_decoherence(self, rate=0.01):
         # Apply random noise to simulate environmental interaction
-        noise = (np.random.rand(*self.position_states.shape) < rate) * np.random.normal(loc=0.0, scale=1.0, size=self.position_states.shape)
+        noise = (self.rng.random(self.position_states.shape) < rate) * self.rng.normal(loc=0.0, scale=1.0, size=self.position_states.shape)
         self.position_states += noise
         norm = np.sum(np.abs(self.position_states)**2)
         self.position_states /= np.sqrt(norm)
 
     def step(self):
+        if self.active_window is not None and self._windowed_step():
+            return
         self.apply_coin()
         self.shift()
-        self.apply_decoherence()
+        self.apply_decoherence(self.decoherence_rate)
+
+    def enable_active_window(self, epsilon=1e-12):
+        """
+        Run coin, shift and noise only inside the bounding box of sites with probability above epsilon.
+
+        Line and grid walks move one site forward along every axis per step, so the box grows on its
+        upper side as the walk advances. Call this again after replacing position_states.
+        """
+        if self.topology == 'network':
+            raise ValueError("Active windows require a line or grid topology.")
+        self.window_epsilon = epsilon
+        shape = self.position_states.shape[1:]
+        self.active_window = support_bounds(self.measure(), epsilon) or [(0, length) for length in shape]
+
+    def disable_active_window(self):
+        self.window_epsilon = None
+        self.active_window = None
+
+    def _windowed_step(self):
+        """ Step only the active box; return False once the walk reaches the lattice edge and wraps around. """
+        shape = self.position_states.shape[1:]
+        if any(stop == length for (_, stop), length in zip(self.active_window, shape)):
+            self.active_window = [(0, length) for length in shape]
+            return False
+        window = (slice(None),) + tuple(slice(start, stop) for start, stop in self.active_window)
+        region = (slice(None),) + tuple(slice(start, stop + 1) for start, stop in self.active_window)
+        self.position_states[window] = apply_coin_field(coin_matrix(self.coin_type), self.position_states[window])
+        states = self.position_states[region]
+        shifted = np.zeros_like(states)
+        shifted[(slice(None),) + (slice(1, None),) * self.dimension] = states[(slice(None),) + (slice(None, -1),) * self.dimension]
+        noise = (self.rng.random(shifted.shape) < self.decoherence_rate) * self.rng.normal(loc=0.0, scale=1.0, size=shifted.shape)
+        shifted += noise
+        states[...] = shifted
+        # Normalize the whole state, since amplitude outside the box still counts towards the norm
+        self.position_states /= np.sqrt(np.sum(np.abs(self.position_states)**2))
+
+        bounds = support_bounds(np.sum(np.abs(states)**2, axis=0), self.window_epsilon)
+        if bounds is None:
+            bounds = [(0, stop + 1 - start) for start, stop in self.active_window]
+        self.active_window = [(offset + start, offset + stop) for (offset, _), (start, stop) in zip(self.active_window, bounds)]
+        return True
 
     def measure(self):
         probability_distribution = np.sum(np.abs(self.position_states)**2, axis=0)
         return probability_distribution
+
     
     # further updates to advanced quantum walk
     def update_topology(self, new_topology):
         self.topology = new_topology
         if new_topology == 'network':
-            self.graph = nx.random_regular_graph(3, len(self.position_states[0]))
+            self.graph = nx.random_regular_graph(3, len(self.position_states[0]), seed=graph_seed(self.rng))
         # Further topology updates to add for future
 
     def entangle_positions(self, pos1, pos2):
@@ -73,31 +113,27 @@ class AdvancedQuantumWalk:
     def initialize_multiple_particles(self, num_particles, positions):
         if len(positions) != num_particles:
             raise ValueError("Number of positions must match number of particles.")
-        self.position_states = np.zeros((2, *([len(positions)] * self.dimension)), dtype=complex)
+        self.position_states = np.zeros((2, *([len(positions)] * self.dimension)), dtype=self.dtype)
         for idx, pos in enumerate(positions):
             self.position_subject_states[0, pos] = 1 / np.sqrt(num_particles)
 
     def set_higher_dimensional_topology(self, dimensions):
         if isinstance(dimensions, int) and dimensions > 1:
             self.dimension = dimensions
-            self.position_states = np.zeros((2, *([len(self.position_states[0])] * dimensions)), dtype=complex)
+            self.position_states = np.zeros((2, *([len(self.position_states[0])] * dimensions)), dtype=self.dtype)
         else:
             raise ValueError("Dimensions must be an integer greater than 1.")
 
     def apply_phase_damping(self, rate=0.01):
         for idx in range(len(self.position_states[0])):
-            if np.random.rand() < rate:
-                self.position_states[:, idx] *= np.exp(-1j * np.random.normal(loc=0.0, scale=0.1))
+            if self.rng.random() < rate:
+                self.position_states[:, idx] *= np.exp(-1j * self.rng.normal(loc=0.0, scale=0.1))
             norm = np.linalg.norm(self.socket_states[:, idx])
             self.position_states[:, idx] /= norm
 
-    def track_amplitudes(self):
-        amplitudes = {}
-        steps = 10  # Define the number of steps to track
-        for step in range(steps):
-            self.step()
-            amplitudes[step] = self.position_states.copy()
-        return amplitudes
+    def track_amplitudes(self, steps=10, stride=1):
+        # Full amplitudes are copied only at the tracked steps
+        return {record['step'] - 1: record['state'] for record in self.iter_steps(steps, stride, observables=('state',))}
 
     def sweep_parameters(self, parameter_range):
         results = {}
@@ -148,12 +184,12 @@ class AdvancedQuantumWalk:
         norm = np.linalg.norm(self.position_states)
         self.position_states /= norm
 
-    def record_evolution(self, steps):
-        history = []
-        for _ in range(steps):
-            self.step()
-            history.append(np.copy(self.position_states))
-        return history
+    def record_evolution(self, steps, stride=1, observables=('state',)):
+        """ Return the state every `stride` steps, or with other observables the iter_steps records, instead of every state. """
+        records = list(self.iter_steps(steps, stride, observables))
+        if tuple(observables) == ('state',):
+            return [record['state'] for record in records]
+        return records
 
     def analyze_spread(self):
         # Calculate the spread as the standard deviation of the probability distribution
@@ -244,7 +280,7 @@ class AdvancedQuantumWalk:
         """ Study entanglement percolation across different network topologies. """
         entanglement_results = {}
         for node_density in np.linspace(0.1, 1, 10):  # Vary the node density in the network
-            self.graph = nx.random_geometric_graph(self.num_positions, node_density)
+            self.graph = nx.random_geometric_graph(self.num_positions, node_density, seed=graph_seed(self.rng))
             self.entangle_positions(0, 1)  # Example: Entangle the first two nodes
             self.step()  # Perform quantum walk steps
             measurement = self.measure()
@@ -292,8 +328,8 @@ class AdvancedQuantumWalk:
     def random_teleportation(self, teleportation_rate=0.01):
         """ Randomly teleport a quantum state to another position with a given probability. """
         for i in range(len(self.position_states[0])):
-            if np.random.rand() < teleportation_rate:
-                target = np.random.randint(len(self.position_states[0]))
+            if self.rng.random() < teleportation_rate:
+                target = self.rng.integers(len(self.position_states[0]))
                 self.position_states[:, target] += self.position_states[:, i]
                 self.position_states[:, i] *= 0
         self.normalize_state()
@@ -373,7 +409,7 @@ class AdvancedQuantumWalk:
         """ Apply particle-particle interaction effects. """
         for i in range(len(self.position_states[0])):
             for j in range(i + 1, len(self.position_states[0])):
-                if np.random.rand() < 0.1:  # Random chance of interaction
+                if self.rng.random() < 0.1:  # Random chance of interaction
                     # Example interaction: SWAP gate
                     self.position_states[:, i], self.position_states[:, j] = self.position_states[:, j], self.position_states[:, i]
         self.normalize_state()
@@ -383,7 +419,7 @@ class AdvancedQuantumWalk:
         current_measure = self.measure()
         if np.std(current_measure) < threshold:
             # Change topology to a more interconnected network to enhance mixing
-            self.graph = nx.connected_watts_strogatz_graph(self.num_positions, k=6, p=0.3)
+            self.graph = nx.connected_watts_strogatz_graph(self.num_positions, k=6, p=0.3, seed=graph_seed(self.rng))
             self.adjacency_matrix = nx.adjacency_matrix(self.graph).toarray()
 
 def quantum_decision_making(self, utility_function, decision_threshold=0.6, feedback=False):
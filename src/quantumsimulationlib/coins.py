@@ -0,0 +1,80 @@
+import numpy as np
+
+COIN_MATRICES = {
+    'Hadamard': np.array([[1, 1], [1, -1]]) / np.sqrt(2),
+    'Grover': 2 * np.full((2, 2), 1/2) - np.eye(2),
+    'Fourier': np.array([[1, 1], [1, -1j]]) / np.sqrt(2)
+}
+
+def coin_matrix(coin_type, coin_dimension=2):
+    """
+    Return the coin_dimension x coin_dimension matrix of a named coin, or validate a custom coin matrix.
+
+    Two-dimensional coins come from COIN_MATRICES. Larger coins are 'Grover' (2/n J - I),
+    'Fourier' or 'DFT' (the unitary discrete Fourier transform) and, for powers of two, the
+    Sylvester 'Hadamard' matrix.
+    """
+    if not isinstance(coin_type, str):
+        coin = np.asarray(coin_type)
+        if coin.shape != (coin_dimension, coin_dimension):
+            raise ValueError("A custom coin must be shaped ({0}, {0}).".format(coin_dimension))
+        return coin
+    if coin_dimension == 2 and coin_type in COIN_MATRICES:
+        coin = COIN_MATRICES.get(coin_type)
+    elif coin_type == 'Grover':
+        coin = np.full((coin_dimension, coin_dimension), 2 / coin_dimension) - np.eye(coin_dimension)
+    elif coin_type in ('Fourier', 'DFT'):
+        indices = np.arange(coin_dimension)
+        coin = np.exp(2j * np.pi * np.outer(indices, indices) / coin_dimension) / np.sqrt(coin_dimension)
+    elif coin_type == 'Hadamard' and coin_dimension & (coin_dimension - 1) == 0:
+        coin = np.ones((1, 1))
+        while len(coin) < coin_dimension:
+            coin = np.kron(COIN_MATRICES['Hadamard'], coin)
+    else:
+        coin = None
+    if coin is None:
+        raise ValueError("Unsupported coin type")
+    return coin
+
+def coin_operation_matrix(coin_operation, coin_dimension=2):
+    """
+    Recover the matrix of a per-position coin callable so it can be applied to all positions at once.
+
+    Coin operations are linear, so probing the callable with the basis coin states yields the
+    columns of its matrix. Callables built by a walker may carry the matrix as `coin_matrix`.
+    """
+    matrix = getattr(coin_operation, 'coin_matrix', None)
+    if matrix is not None:
+        return np.asarray(matrix)
+    columns = []
+    for basis_state in np.eye(coin_dimension, dtype=complex):
+        column = np.asarray(coin_operation(basis_state))
+        if column.shape != (coin_dimension,):
+            raise TypeError("coin_operation must map a coin state of shape ({0},) to shape ({0},).".format(coin_dimension))
+        columns.append(column)
+    return np.column_stack(columns)
+
+def apply_coin_field(coin, state, out=None):
+    """
+    Apply a coin to every position of a (k, *grid) state in one batched operation.
+
+    Args:
+        coin (np.ndarray): A uniform (k, k) coin or a per-site coin field shaped (*grid, k, k).
+        state (np.ndarray): The walker state with the coin axis first.
+        out (np.ndarray): Optional contiguous output array shaped like `state`; it must not overlap `state`.
+
+    Returns:
+        np.ndarray: The state after the coin has been applied.
+    """
+    coin_dimension = state.shape[0]
+    # Match the coin to the state precision so single-precision states stay single precision
+    coin = np.asarray(coin).astype(np.result_type(state.dtype, np.complex64), copy=False)
+    if coin.shape == (coin_dimension, coin_dimension):
+        flat_state = state.reshape(coin_dimension, -1)
+        if out is None:
+            return np.matmul(coin, flat_state).reshape(state.shape)
+        np.matmul(coin, flat_state, out=out.reshape(coin_dimension, -1))
+        return out
+    if coin.shape == state.shape[1:] + (coin_dimension, coin_dimension):
+        return np.einsum('...ij,j...->i...', coin, state, out=out)
+    raise ValueError("Coin must be shaped ({0}, {0}) or (*grid, {0}, {0}).".format(coin_dimension))
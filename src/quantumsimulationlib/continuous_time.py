@@ -0,0 +1,97 @@
+import numpy as np
+
+def graph_hamiltonian(adjacency, kind='adjacency', gamma=1.0):
+    """
+    Build a sparse CSR Hamiltonian for a continuous-time walk.
+
+    Args:
+        adjacency: An adjacency matrix (dense or scipy.sparse) or a networkx graph.
+        kind (str): 'adjacency' for H = -gamma * A or 'laplacian' for H = gamma * (D - A).
+        gamma (float): The hopping rate.
+
+    Returns:
+        scipy.sparse.csr_matrix: The Hamiltonian.
+    """
+    from scipy import sparse
+    if hasattr(adjacency, 'nodes'):
+        import networkx as nx
+        adjacency = nx.to_scipy_sparse_array(adjacency, format='csr')
+    adjacency = sparse.csr_matrix(adjacency)
+    adjacency = adjacency.astype(np.result_type(adjacency.dtype, float))
+    if kind == 'adjacency':
+        return -gamma * adjacency
+    if kind == 'laplacian':
+        degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+        return gamma * (sparse.diags(degrees, format='csr') - adjacency)
+    raise ValueError("Unsupported Hamiltonian kind")
+
+def spectral_bounds(hamiltonian):
+    """ Return (lower, upper) bounds on the spectrum of a Hermitian matrix from its Gershgorin discs. """
+    from scipy import sparse
+    diagonal = np.real(hamiltonian.diagonal())
+    if sparse.issparse(hamiltonian):
+        row_sums = np.asarray(abs(hamiltonian).sum(axis=1)).ravel()
+    else:
+        row_sums = np.sum(np.abs(hamiltonian), axis=1)
+    radii = row_sums - np.abs(diagonal)
+    return float(np.min(diagonal - radii)), float(np.max(diagonal + radii))
+
+def continuous_time_evolve(hamiltonian, state, times, tol=1e-12, bounds=None):
+    """
+    Apply exp(-i H t) to a state for one or more times without forming the exponential.
+
+    The propagator is expanded in Chebyshev polynomials of the rescaled Hamiltonian,
+    exp(-i H t) = exp(-i c t) [J_0(a t) + 2 sum_k (-i)^k J_k(a t) T_k((H - c) / a)],
+    where c and a are the centre and half-width of the spectrum. Each term costs one sparse
+    matrix-vector product, the series is cut once every Bessel coefficient drops below `tol`,
+    and all requested times share the same polynomial vectors.
+
+    Args:
+        hamiltonian: A Hermitian (N, N) matrix, dense or scipy.sparse.
+        state (np.ndarray): The state with the node axis first, shaped (N,) or (N, m).
+        times (float or sequence): The evolution time or a sequence of output times.
+        tol (float): The truncation threshold for the expansion coefficients.
+        bounds (tuple): Optional (lower, upper) spectral bounds; Gershgorin bounds are used otherwise.
+
+    Returns:
+        np.ndarray: The evolved state, with a leading time axis if `times` is a sequence.
+    """
+    from scipy import sparse
+    from scipy.special import jv
+    if not sparse.issparse(hamiltonian):
+        hamiltonian = sparse.csr_matrix(np.asarray(hamiltonian))
+    state = np.asarray(state, dtype=complex)
+    if hamiltonian.shape != (state.shape[0], state.shape[0]):
+        raise ValueError("Hamiltonian must be shaped (N, N) for a state with N nodes on its first axis.")
+    time_array = np.atleast_1d(np.asarray(times, dtype=float))
+    lower, upper = spectral_bounds(hamiltonian) if bounds is None else bounds
+    centre = (upper + lower) / 2
+    # A little padding keeps the rescaled spectrum strictly inside [-1, 1]
+    half_width = max((upper - lower) / 2, 1e-12) * 1.01
+
+    arguments = half_width * np.abs(time_array)
+    max_order = int(np.max(arguments) * 1.5) + 50
+    orders = np.arange(max_order)
+    bessel = jv(orders[np.newaxis, :], arguments[:, np.newaxis])
+    significant = np.flatnonzero(np.max(np.abs(bessel), axis=0) > tol)
+    num_terms = int(significant[-1]) + 1 if significant.size else 1
+    coefficients = 2 * bessel[:, :num_terms] * (-1j * np.sign(time_array)[:, np.newaxis]) ** orders[:num_terms]
+    coefficients[:, 0] /= 2
+    coefficients *= np.exp(-1j * centre * time_array)[:, np.newaxis]
+
+    def rescaled_product(vector):
+        product = hamiltonian @ vector
+        product -= centre * vector
+        product /= half_width
+        return product
+
+    broadcast = (slice(None),) + (np.newaxis,) * state.ndim
+    results = coefficients[:, 0][broadcast] * state
+    previous, current = state, rescaled_product(state)
+    for order in range(1, num_terms):
+        results += coefficients[:, order][broadcast] * current
+        following = rescaled_product(current)
+        following *= 2
+        following -= previous
+        previous, current = current, following
+    return results if np.ndim(times) else results[0]
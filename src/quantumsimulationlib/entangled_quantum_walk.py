@@ -1,39 +1,41 @@
 import numpy as np
 import networkx as nx
-
-class EntangledQuantumWalk:
-    def __init__(self, num_positions, num_particles, dimension=1, topology='line', coin_type='Hadamard'):
+from .coins import coin_matrix
+from .observables import coin_density_matrix
+from .stepping import StepIteratorMixin
+from .utils import complex_dtype, graph_seed
+
+class EntangledQuantumWalk(StepIteratorMixin):
+    def __init__(self, num_positions, num_particles, dimension=1, topology='line', coin_type='Hadamard', seed=None, dtype=complex):
+        self.rng = np.random.default_rng(seed)
+        self.dtype = complex_dtype(dtype)
         self.dimension = dimension
         self.topology = topology
         self.coin_type = coin_type
         self.num_particles = num_particles
 
         if topology == 'network':
-            self.graph = nx.random_regular_graph(3, num_positions)
-            self.position_states = np.zeros((2 ** num_particles, nx.number_of_nodes(self.graph)), dtype=complex)
+            self.graph = nx.random_regular_graph(3, num_positions, seed=graph_seed(self.rng))
+            self.position_states = np.zeros((2 ** num_particles, nx.number_of_nodes(self.graph)), dtype=self.dtype)
         else:
             shape = (2 ** num_particles, *([num_positions] * dimension))
-            self.position_states = np.zeros(shape, dtype=complex)
+            self.position_states = np.zeros(shape, dtype=self.dtype)
 
         for i in range(num_particles):
             self.position_states[1 << i, i] = 1 / np.sqrt(num_particles)
 
     def apply_coin(self):
-        H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
-        for idx in range(2 ** self.num_particles):
-            #self.position_states[idx] = np.kron(H, self.position_states[idx])
-            if self.dimension > 1 or self.topology == 'network':
-                # Apply coin flip for each node in network
-                for node in range(self.position_states.shape[1]):
-                    self.position_states[idx, node] = np.dot(H, self.position_states[idx, node])
-            else:
-                # Apply coin flip across all positions for each state configuration
-                for pos in np.ndindex(*self.position_states[idx].shape):
-                    self.position_states[idx][pos] = np.dot(H, self.position_states[idx][pos])
-                pass
+        """ Apply the coin to every particle's coin qubit, i.e. its n-fold tensor power, at every position. """
+        grid_shape = self.position_states.shape[1:]
+        coin = coin_matrix(self.coin_type).astype(self.dtype)
+        # Index bit i of the first axis is the coin of particle i, so split that axis into one axis per particle
+        states = self.position_states.reshape((2,) * self.num_particles + grid_shape)
+        for particle in range(self.num_particles):
+            states = np.moveaxis(np.tensordot(coin, states, axes=([1], [particle])), 0, particle)
+        self.position_states = np.ascontiguousarray(states).reshape(self.position_states.shape)
 
     def shift(self):
-        new_state = np.zeros_like(self.position_states, dtype=complex)
+        new_state = np.zeros_like(self.position_states)
         if self.topology == 'line' or self.topology == 'grid':
             # Apply shifts along each dimension
             for axis in range(1, 1 + self.dimension):
@@ -48,7 +50,7 @@ class EntangledQuantumWalk:
 
     def apply_decoherence(self, rate=0.01):
         for idx in range(2 ** self.num_particles):
-            noise = (np.random.rand(*self.position_states[idx].shape) < rate) * np.random.normal(loc=0.0, scale=1.0, size=self.position_states[idx].shape)
+            noise = (self.rng.random(self.position_states[idx].shape) < rate) * self.rng.normal(loc=0.0, scale=1.0, size=self.position_states[idx].shape)
             self.position_states[idx] += noise
             norm = np.sum(np.abs(self.position_states[idx])**2)
             self.position_states[idx] /= np.sqrt(norm)
@@ -62,6 +64,7 @@ class EntangledQuantumWalk:
         probabilities = np.sum(np.abs(self.position_states)**2, axis=0)
         return probabilities
 
+
     def generate_entanglement(self, particles):
         if len(particles) != 2:
             raise ValueError("Currently only supports entangling two particles.")
@@ -107,7 +110,7 @@ class EntangledQuantumWalk:
             for j in range(self.num_particles):
                 if i != j:
                     # Simplified calculation of entanglement, e.g., using concurrence or mutual information
-                    entanglement_matrix[i, j] = np.random.rand()  # Placeholder for actual calculation
+                    entanglement_matrix[i, j] = self.rng.random()  # Placeholder for actual calculation
         plt.imshow(entanglement_matrix, cmap='hot', interpolation='nearest')
         plt.colorbar()
         plt.xlabel('Particle Index')
@@ -115,13 +118,17 @@ class EntangledQuantumWalk:
         plt.title('Entanglement Between Particles')
         plt.show()
 
-    def perform_state_tomography(self):
+    def perform_state_tomography(self, full=False):
         """
         Perform state tomography based on the current quantum state.
-        This function constructs the density matrix from the outer product of the state vector with itself.
+        By default this returns the reduced density matrix of the 2 ** num_particles internal states,
+        traced over position directly from the amplitudes in O(N). With full=True it constructs the
+        density matrix of the whole flattened state, which needs O(N^2) memory.
         Note: In a more realistic setting, you would need to perform measurements in various bases and use statistical
         techniques to reconstruct the density matrix.
         """
+        if not full:
+            return coin_density_matrix(self.position_states)
         flat_state = self.position_states.flatten()
         density_matrix = np.outer(flat_state, np.conjugate(flat_state))
         return density_matrix
@@ -257,10 +264,10 @@ class EntangledQuantumWalk:
         """ Simulate the effect of decoherence on the entangled quantum states. """
         for idx in range(2 ** self.num_particles):
             # Apply decoherence effects randomly based on the decoherence rate
-            if np.random.rand() < decoherence_rate:
+            if self.rng.random() < decoherence_rate:
                 # Random phase and amplitude damping
-                phase_noise = np.exp(1j * np.random.normal(0, 0.1))
-                amplitude_damping = np.exp(-np.random.rand() * 0.05)
+                phase_noise = np.exp(1j * self.rng.normal(0, 0.1))
+                amplitude_damping = np.exp(-self.rng.random() * 0.05)
                 self.position_states[idx] *= phase_noise * amplitude_damping
 
         # Normalize to maintain a valid quantum state
@@ -273,7 +280,7 @@ class EntangledQuantumWalk:
             # Measure each state vector individually
             state_vector = self.position_states[idx]
             probabilities = np.abs(state_vector)**2
-            measurement_outcome = np.random.choice(len(probabilities), p=probabilities)
+            measurement_outcome = self.rng.choice(len(probabilities), p=probabilities)
             measurement_results[idx] = measurement_outcome
 
         return measurement_results
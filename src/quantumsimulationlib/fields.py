@@ -0,0 +1,26 @@
+import numpy as np
+from .utils import evaluate_on_grid
+
+def compile_field(field, grid_shape, value_shape=()):
+    """
+    Evaluate a spatial field into an array shaped (*grid_shape, *value_shape).
+
+    Args:
+        field: An array of that shape, or a generator function. Functions are first called once with
+            the coordinate arrays from np.indices (a single array in 1D, a tuple of arrays otherwise)
+            and, if that does not return the whole field, called once per site with an int (1D) or an
+            index tuple. Functions are evaluated on every call, so random fields draw a new realization;
+            callers such as set_potential evaluate once and keep the result.
+        grid_shape (tuple): The shape of the position grid.
+        value_shape (tuple): The shape of the value at each site, e.g. () for a potential or (k, k) for a coin.
+
+    Returns:
+        np.ndarray: The field values.
+    """
+    grid_shape, value_shape = tuple(grid_shape), tuple(value_shape)
+    if callable(field):
+        return evaluate_on_grid(field, grid_shape, value_shape)
+    field = np.asarray(field)
+    if field.shape != grid_shape + value_shape:
+        raise ValueError("Field must be shaped {}.".format(grid_shape + value_shape))
+    return field
@@ -0,0 +1,66 @@
+import numpy as np
+from .coins import apply_coin_field
+
+def momentum_space_operator(coin, displacements, grid_shape):
+    """
+    Return the one-step walk operator of a homogeneous periodic walk at every wavevector.
+
+    Args:
+        coin (np.ndarray): The uniform (k, k) coin.
+        displacements (np.ndarray): A (k, d) array with the lattice displacement of each coin component.
+        grid_shape (tuple): The periodic lattice shape.
+
+    Returns:
+        np.ndarray: The operators shaped (*grid_shape, k, k).
+    """
+    wavevectors = np.meshgrid(*[2 * np.pi * np.fft.fftfreq(size) for size in grid_shape], indexing='ij')
+    # Shifting a component by v multiplies its Fourier amplitudes by exp(-i k.v)
+    phases = np.stack([np.exp(-1j * sum(v * kv for v, kv in zip(displacement, wavevectors)))
+                       for displacement in displacements], axis=-1)
+    return phases[..., :, np.newaxis] * coin
+
+def operator_power(operators, steps):
+    """
+    Raise a stack of k x k operators to an integer power.
+
+    2x2 operators use the closed form M^t = D_t M - det(M) D_(t-1) I, where D_t is the divided
+    difference (l1^t - l2^t) / (l1 - l2) of the eigenvalues written in a form that stays accurate
+    for nearly degenerate eigenvalues. Other sizes fall back to repeated squaring.
+    """
+    if operators.shape[-2:] != (2, 2):
+        return np.linalg.matrix_power(operators, steps)
+    a, b, c, d = operators[..., 0, 0], operators[..., 0, 1], operators[..., 1, 0], operators[..., 1, 1]
+    determinant = a * d - b * c
+    if np.any(determinant == 0):
+        return np.linalg.matrix_power(operators, steps)
+    half_trace = (a + d) / 2
+    root = np.sqrt(half_trace**2 - determinant)
+    log_eigenvalue_1, log_eigenvalue_2 = np.log(half_trace + root), np.log(half_trace - root)
+    mean_log = (log_eigenvalue_1 + log_eigenvalue_2) / 2
+    half_gap = (log_eigenvalue_1 - log_eigenvalue_2) / 2
+    degenerate = np.abs(half_gap) < 1e-8
+    denominator = np.where(degenerate, 1, np.sinh(half_gap))
+
+    def divided_difference(n):
+        ratio = np.where(degenerate, n, np.sinh(n * half_gap) / denominator)
+        return np.exp((n - 1) * mean_log) * ratio
+
+    power = divided_difference(steps)[..., np.newaxis, np.newaxis] * operators
+    correction = determinant * divided_difference(steps - 1)
+    power[..., 0, 0] -= correction
+    power[..., 1, 1] -= correction
+    return power
+
+def fourier_evolve(state, coin, displacements, steps):
+    """
+    Apply `steps` coin-then-shift steps of a homogeneous periodic walk to a (k, *grid) state in O(M log M).
+
+    The walk is diagonal in momentum space, so the state is transformed once, every wavevector is
+    multiplied by the steps-th power of its k x k operator, and the result is transformed back.
+    Negative `steps` run the walk backwards.
+    """
+    axes = tuple(range(1, state.ndim))
+    momentum_state = np.fft.fftn(state, axes=axes)
+    operators = operator_power(momentum_space_operator(coin, displacements, state.shape[1:]), steps)
+    momentum_state = apply_coin_field(operators, momentum_state)
+    return np.fft.ifftn(momentum_state, axes=axes).astype(state.dtype, copy=False)
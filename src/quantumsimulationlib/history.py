@@ -0,0 +1,134 @@
+import numpy as np
+
+class HistoryRecorder:
+    """
+    Fixed-size ring buffer of probability snapshots for time-position heatmaps of long walks.
+
+    Snapshots are written into one preallocated (capacity, *shape) array in a compact float dtype,
+    so memory does not grow with the number of steps; once full, the oldest snapshots are
+    overwritten. With `path` the buffer is an np.memmap on disk, so histories larger than RAM
+    (e.g. 10^5 steps x 10^5 sites in float16) can be recorded and read back in decimated slices.
+    With `spill_path` the ring stays in RAM and every snapshot it evicts is appended to a growing
+    np.memmap at that path instead, so the whole history is kept while only `capacity` snapshots
+    occupy memory.
+    """
+    def __init__(self, shape, capacity, dtype=np.float32, path=None, spill_path=None):
+        self.shape = (shape,) if np.ndim(shape) == 0 else tuple(shape)
+        self.capacity = capacity
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float16, np.float32, np.float64):
+            raise ValueError("History snapshots must be stored as float16, float32 or float64.")
+        self.path = path
+        if path is None:
+            self.buffer = np.zeros((capacity,) + self.shape, dtype=dtype)
+        else:
+            self.buffer = np.memmap(path, dtype=dtype, mode='w+', shape=(capacity,) + self.shape)
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.count = 0
+        # Snapshots evicted from the ring, oldest first, when spilling to disk
+        self.spill_path = spill_path
+        self.spill = None
+        self.spill_steps = np.zeros(0, dtype=np.int64)
+        self.spilled = 0
+
+    def __len__(self):
+        return self.spilled + min(self.count, self.capacity)
+
+    def record(self, probabilities, step=None):
+        """ Store one snapshot, overwriting (or with spill_path spilling) the oldest one when the buffer is full. """
+        slot = self.count % self.capacity
+        if self.spill_path is not None and self.count >= self.capacity:
+            self._spill(slot)
+        self.buffer[slot] = probabilities
+        self.steps[slot] = self.count if step is None else step
+        self.count += 1
+
+    def record_walk(self, walker, num_steps, stride=1, **step_options):
+        """ Step a walker with iter_steps and record its probabilities every `stride` steps, numbering on from the last snapshot. """
+        last_step = int(self.steps[(self.count - 1) % self.capacity]) if self.count else 0
+        for record in walker.iter_steps(num_steps, stride, ('probability',), **step_options):
+            self.record(record['probability'], last_step + record['step'])
+        return self
+
+    def _spill(self, slot):
+        """ Append the snapshot in `slot`, which is about to be overwritten, to the spill file. """
+        if self.spill is None or self.spilled == len(self.spill):
+            # Grow the file geometrically, so appending stays amortized O(1) per snapshot
+            size = max(self.capacity, 2 * self.spilled)
+            shape = (size,) + self.shape
+            if self.spill is None:
+                self.spill = np.memmap(self.spill_path, dtype=self.buffer.dtype, mode='w+', shape=shape)
+            else:
+                self.spill.flush()
+                self.spill = None
+                with open(self.spill_path, 'r+b') as spill_file:
+                    spill_file.truncate(int(np.prod(shape)) * self.buffer.itemsize)
+                self.spill = np.memmap(self.spill_path, dtype=self.buffer.dtype, mode='r+', shape=shape)
+            steps = np.zeros(size, dtype=np.int64)
+            steps[:self.spilled] = self.spill_steps[:self.spilled]
+            self.spill_steps = steps
+        self.spill[self.spilled] = self.buffer[slot]
+        self.spill_steps[self.spilled] = self.steps[slot]
+        self.spilled += 1
+
+    def clear(self):
+        self.count = 0
+        self.spilled = 0
+
+    def flush(self):
+        for buffer in (self.buffer, self.spill):
+            if isinstance(buffer, np.memmap):
+                buffer.flush()
+
+    def _segments(self):
+        """ Return the (buffer, steps, start, stop) ranges of the stored snapshots, oldest first. """
+        segments = [(self.spill, self.spill_steps, 0, self.spilled)] if self.spilled else []
+        if self.count <= self.capacity:
+            return segments + [(self.buffer, self.steps, 0, self.count)]
+        oldest = self.count % self.capacity
+        return segments + [(self.buffer, self.steps, oldest, self.capacity), (self.buffer, self.steps, 0, oldest)]
+
+    def recorded_steps(self):
+        """ Return the step number of every stored snapshot, oldest first. """
+        return np.concatenate([steps[start:stop] for _, steps, start, stop in self._segments()])
+
+    def snapshots(self, time_stride=1, position_stride=1):
+        """
+        Return the stored snapshots oldest first, keeping every time_stride-th one and every position_stride-th site.
+
+        Before the buffer wraps around (or spills) this is a view of the buffer (or memmap) with no copy;
+        afterwards only the selected snapshots are copied.
+        """
+        sites = (slice(None, None, position_stride),) * len(self.shape)
+        parts = []
+        offset = 0
+        for buffer, _, start, stop in self._segments():
+            # Keep the time stride continuous across the wrap-around and spill points
+            first = start + (-offset) % time_stride
+            parts.append(buffer[(slice(first, stop, time_stride),) + sites])
+            offset += stop - start
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def heatmap(self, max_steps=2048, max_positions=2048):
+        """ Return a (time, position) array decimated to at most max_steps x max_positions for plotting 1D walks. """
+        time_stride = max(1, -(-len(self) // max_steps)) if max_steps else 1
+        position_stride = max(1, -(-self.shape[-1] // max_positions)) if max_positions else 1
+        return self.snapshots(time_stride, position_stride)
+
+# Snapshots kept in RAM by record_history unless a capacity is given; older ones are dropped or spilled
+DEFAULT_HISTORY_CAPACITY = 1024
+
+def record_history(walker, num_steps, stride=1, history=None, capacity=DEFAULT_HISTORY_CAPACITY, dtype=np.float32, path=None, spill_path=None):
+    """
+    Run a walker for num_steps and return a HistoryRecorder holding its probabilities every `stride` steps.
+
+    Without `history` a recorder starting with the current distribution is created: a ring of the last
+    `capacity` snapshots (or of the whole run if it is shorter or capacity is None), in RAM or on disk at
+    `path`, spilling evicted snapshots to `spill_path` if given. An existing recorder keeps its own settings.
+    """
+    if history is None:
+        initial = walker.measure()
+        run_length = num_steps // stride + 2
+        history = HistoryRecorder(initial.shape, run_length if capacity is None else min(capacity, run_length), dtype, path, spill_path)
+        history.record(initial, 0)
+    return history.record_walk(walker, num_steps, stride)
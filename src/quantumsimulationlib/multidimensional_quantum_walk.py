@@ -1,55 +1,259 @@
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
-
-class MultiDimensionalQuantumWalk:
-    def __init__(self, dimensions, size, start_position, coin_type='Hadamard'):
+from .coins import apply_coin_field, coin_matrix
+from .domain_decomposition import parallel_steps
+from .fields import compile_field
+from .fourier import fourier_evolve
+from .observables import coin_entanglement_entropy
+from .oracles import compile_oracle
+from .out_of_core import block_rows, create_state_file, state_file_paths, stream_coin, stream_probabilities, stream_step
+from .stepping import StepIteratorMixin
+from .transition import walk_operator
+from .utils import complex_dtype, lattice_displacements, neighbor_sum, normalize_state, shift_components, shift_slices, support_bounds
+
+class MultiDimensionalQuantumWalk(StepIteratorMixin):
+    def __init__(self, dimensions, size, start_position, coin_type='Hadamard', seed=None, dtype=complex, memmap_dir=None, coin_space='diagonal'):
+        self.rng = np.random.default_rng(seed)
+        self.dtype = complex_dtype(dtype)
         self.dimensions = dimensions
         self.size = size
         self.grid_shape = (size,) * dimensions
-        self.position_states = np.zeros((2,) + self.grid_shape, dtype=complex)
+        self.coin_space = coin_space
+        if coin_space == 'diagonal':
+            # Coin component 0 moves one site forward along every axis, component 1 one site back
+            self.displacements = np.array([[1] * dimensions, [-1] * dimensions])
+        elif coin_space == 'lattice':
+            # One coin component per lattice direction: +/- one site along each axis
+            self.displacements = lattice_displacements(dimensions)
+        else:
+            raise ValueError("coin_space must be 'diagonal' or 'lattice'.")
+        self.coin_dimension = len(self.displacements)
+        # With memmap_dir the state lives in files on disk and is streamed through RAM in blocks of block_bytes
+        self.memmap_dir = memmap_dir
+        self.block_bytes = 256 * 2**20
+        if memmap_dir is None:
+            self.position_states = np.zeros((self.coin_dimension,) + self.grid_shape, dtype=self.dtype)
+        else:
+            os.makedirs(memmap_dir, exist_ok=True)
+            self.position_states = create_state_file(state_file_paths(memmap_dir)[0], (self.coin_dimension,) + self.grid_shape, self.dtype)
         self.start_position = start_position
         self.coin_type = coin_type
-
-        # Initialize walker position
-        self.position_states[(0,) + start_position] = 1 / np.sqrt(2)
-        self.position_states[(1,) + start_position] = 1 / np.sqrt(2)
+        # Optional (*grid, k, k) coin field replacing the uniform coin, and cached (*grid,) potential phase factors
+        self.coin_field = None
+        self.potential_phases = None
+        # 'periodic', 'reflective' or 'absorbing'; streamed, parallel and Fourier evolution are periodic only
+        self.boundary_condition = 'periodic'
+        self.steps_taken = 0
+        # Single-precision states are projected back to unit norm every this many steps to stop drift
+        self.renormalize_interval = 64 if self.dtype == np.complex64 else None
+        self.window_epsilon = None
+        self.active_window = None
+
+        # Initialize walker position in an equal superposition of all coin states
+        self.position_states[(slice(None),) + tuple(start_position)] = 1 / np.sqrt(self.coin_dimension)
 
     def hadamard_coin(self, state):
         H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
         return np.tensordot(H, state, axes=[1, 0])
 
     def shift(self):
-        new_state = np.zeros_like(self.position_states)
-        for dimension in range(self.dimensions):
-            for direction in [0, 1]:
-                axis = direction + 1
-                roll = 1 if direction == 0 else -1
-                slices = [slice(None)] * (self.dimensions + 1)
-                slices[axis] = slice(None, -1) if direction == 0 else slice(1, None)
-                target_slices = slices.copy()
-                target_slices[axis] = slice(1, None) if direction == 0 else slice(None, -1)
-                new_state[tuple(slices)] += np.roll(self.position_states[tuple(target_slices)], roll, axis=axis)
-        self.position_states = new_state
+        if self.out_of_core:
+            self._stream_step(coin=None)
+            return
+        # Shift into a reused buffer and swap it with the state, so a step allocates nothing
+        buffer = getattr(self, '_shift_buffer', None)
+        if buffer is None or buffer.shape != self.position_states.shape or buffer.dtype != self.position_states.dtype \
+                or np.shares_memory(buffer, self.position_states):
+            buffer = np.empty_like(self.position_states)
+        shift_components(self.position_states, buffer, self.displacements, self.boundary_condition)
+        self._shift_buffer, self.position_states = self.position_states, buffer
 
     def step(self):
-        self.position_states = self.hadamard_coin(self.position_states)
-        self.shift()
+        if self.out_of_core:
+            self._stream_step(coin=self.coin_operator(), phases=self.potential_phases)
+        elif self.active_window is None or not self._windowed_step():
+            self.apply_potential()
+            self.apply_coin()
+            self.shift()
+        self.steps_taken += 1
+        if self.renormalize_interval and self.steps_taken % self.renormalize_interval == 0:
+            self.renormalize()
+
+    def parallel_step(self, num_steps, workers=None):
+        """
+        Take num_steps steps with the grid split into first-axis slabs, one per worker process.
+
+        Workers share the state through shared memory and exchange halos every step, so the
+        result matches num_steps calls to step() on the full periodic lattice.
+        """
+        self._require_periodic('Parallel stepping')
+        remaining = num_steps
+        while remaining > 0:
+            chunk = remaining
+            if self.renormalize_interval:
+                chunk = min(chunk, self.renormalize_interval - self.steps_taken % self.renormalize_interval)
+            evolved = parallel_steps(self.position_states, self.coin_operator(), self.displacements, chunk, workers, self.potential_phases)
+            if self.out_of_core:
+                self.position_states[...] = evolved
+            else:
+                self.position_states = evolved
+            self.steps_taken += chunk
+            remaining -= chunk
+            if self.renormalize_interval and self.steps_taken % self.renormalize_interval == 0:
+                self.renormalize()
+        if self.active_window is not None:
+            self.enable_active_window(self.window_epsilon)
+
+    def renormalize(self):
+        """ Project the state back to unit norm, removing the norm drift of rounded arithmetic. """
+        if not self.out_of_core:
+            normalize_state(self.position_states)
+            return
+        rows = self._block_rows()
+        norm = np.sqrt(stream_probabilities(self.position_states, rows, keep_axes=(), out=np.zeros((), dtype=np.float64)))
+        for start in range(0, self.size, rows):
+            self.position_states[:, start:start + rows] /= norm.astype(self.position_states.real.dtype)
+        self.position_states.flush()
+
+    @property
+    def out_of_core(self):
+        """ True when the state is a file-backed np.memmap that is processed block by block. """
+        return isinstance(self.position_states, np.memmap)
+
+    def _block_rows(self):
+        return block_rows(self.position_states.shape, self.position_states.itemsize, self.block_bytes)
+
+    def _stream_step(self, coin, phases=None):
+        """ Phase, coin (unless coin is None) and shift the file-backed state into the spare file, then swap the two. """
+        self._require_periodic('Out-of-core stepping')
+        spare = getattr(self, '_spare_states', None)
+        if spare is None or spare.shape != self.position_states.shape or spare.dtype != self.position_states.dtype:
+            current_path = os.path.abspath(self.position_states.filename)
+            paths = state_file_paths(self.memmap_dir)
+            spare_path = paths[1] if current_path == os.path.abspath(paths[0]) else paths[0]
+            spare = create_state_file(spare_path, self.position_states.shape, self.position_states.dtype)
+        stream_step(self.position_states, spare, coin, self.displacements, self._block_rows(), phases)
+        self._spare_states, self.position_states = self.position_states, spare
+
+    def _require_periodic(self, operation):
+        if self.boundary_condition != 'periodic':
+            raise ValueError("{} supports only periodic boundaries.".format(operation))
+
+    def coin_operator(self):
+        """ Return the coin field if one is set, otherwise the uniform coin matrix for this walk's coin space. """
+        if self.coin_field is not None:
+            return self.coin_field
+        return coin_matrix(self.coin_type, self.coin_dimension)
+
+    def set_coin_field(self, coin_field):
+        """
+        Use a per-site coin instead of the uniform coin; pass None to return to the uniform coin.
+
+        The field is an array shaped (*grid, k, k) or a function evaluated once by this call
+        (see fields.compile_field). It is stored and applied with one batched contraction per step.
+        """
+        if coin_field is not None:
+            coin_field = compile_field(coin_field, self.grid_shape, (self.coin_dimension,) * 2).astype(self.dtype)
+        self.coin_field = coin_field
+
+    def set_potential(self, potential, time_step=1.0):
+        """
+        Add an on-site potential V, applied as the phase exp(-i V time_step) before every coin; None removes it.
 
-    def measure(self):
+        The potential is an array shaped like the grid or a function evaluated once by this call, so a
+        random generator gives a new realization per call. The phase factors are stored on the walker,
+        so each step costs a single multiply.
+        """
+        if potential is not None:
+            potential = compile_field(potential, self.grid_shape)
+            potential = np.exp(-1j * time_step * potential).astype(self.dtype)
+        self.potential_phases = potential
+
+    def apply_potential(self):
+        if self.potential_phases is not None:
+            self.position_states *= self.potential_phases
+
+    def enable_active_window(self, epsilon=1e-12):
+        """
+        Run coin and shift only inside the bounding box of sites with probability above epsilon.
+
+        The box grows by one site per side each step as the walk spreads. Call this again after
+        replacing position_states so the box is recomputed.
+        """
+        self.window_epsilon = epsilon
+        self.active_window = support_bounds(self.measure(), epsilon) or [(0, self.size)] * self.dimensions
+
+    def disable_active_window(self):
+        self.window_epsilon = None
+        self.active_window = None
+
+    def _windowed_step(self):
+        """ Step only the active box; return False once the walk needs the whole periodic lattice. """
+        reach = [int(r) for r in np.abs(self.displacements).max(axis=0)]
+        if any(start < r or stop + r > self.size for (start, stop), r in zip(self.active_window, reach)):
+            self.active_window = [(0, self.size)] * self.dimensions
+            return False
+        window = (slice(None),) + tuple(slice(start, stop) for start, stop in self.active_window)
+        if self.potential_phases is not None:
+            self.position_states[window] *= self.potential_phases[window[1:]]
+        coin = self.coin_operator()
+        if coin.ndim > 2:
+            coin = coin[window[1:]]
+        self.position_states[window] = apply_coin_field(coin, self.position_states[window])
+
+        # Shift inside the box plus a margin; amplitude outside the box is negligible
+        region_starts = [start - r for (start, _), r in zip(self.active_window, reach)]
+        region = self.position_states[(slice(None),) + tuple(slice(start - r, stop + r) for (start, stop), r in zip(self.active_window, reach))]
+        shifted = np.zeros_like(region)
+        for component, displacement in enumerate(self.displacements):
+            target, source = shift_slices(displacement)
+            shifted[component][target] = region[component][source]
+        region[...] = shifted
+
+        bounds = support_bounds(np.sum(np.abs(region)**2, axis=0), self.window_epsilon)
+        if bounds is None:
+            bounds = [(0, length) for length in region.shape[1:]]
+        self.active_window = [(offset + start, offset + stop) for offset, (start, stop) in zip(region_starts, bounds)]
+        return True
+
+    def evolve_to(self, t):
+        """ Jump the periodic walk from step self.steps_taken directly to step t using a momentum-space propagator. """
+        self._require_periodic('Momentum-space evolution')
+        if self.coin_field is not None or self.potential_phases is not None:
+            raise ValueError("Momentum-space evolution needs a uniform coin and no potential.")
+        self.position_states = fourier_evolve(self.position_states, self.coin_operator(), self.displacements, t - self.steps_taken)
+        self.steps_taken = t
+        if self.active_window is not None:
+            self.enable_active_window(self.window_epsilon)
+
+    def measure(self, keep_axes=None, out=None, path=None):
+        """
+        Return the position probabilities, or with keep_axes the marginal over those lattice axes.
+        `out` optionally receives the result; with `path` it is written to a new np.memmap file there
+        instead, which the caller owns. Out-of-core walks stream the state block by block.
+        """
+        if path is not None:
+            shape = self.grid_shape if keep_axes is None else tuple(self.grid_shape[axis] for axis in sorted(keep_axes))
+            out = np.memmap(path, dtype=self.position_states.real.dtype, mode='w+', shape=shape)
+        if self.out_of_core:
+            return stream_probabilities(self.position_states, self._block_rows(), keep_axes, out)
         probability_distribution = np.sum(np.abs(self.position_states)**2, axis=0)
+        if keep_axes is not None:
+            summed_axes = tuple(axis for axis in range(self.dimensions) if axis not in keep_axes)
+            probability_distribution = np.sum(probability_distribution, axis=summed_axes)
+        if out is not None:
+            out[...] = probability_distribution
+            return out
         return probability_distribution
 
+
     def apply_coin(self):
-        if self.coin_type == 'Hadamard':
-            H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
-        elif self.coin_type == 'Grover':
-            G = 2 * np.full((2, 2), 1/2) - np.eye(2)
-        elif self.coin_type == 'Fourier':
-            F = np.array([[1, 1], [1, -1j]]) / np.sqrt(2)
-        else:
-            raise ValueError("Unsupported coin type")
-        self.position_states = np.tensordot(H, self.position_states, axes=[1, 0])
+        if self.out_of_core:
+            stream_coin(self.position_states, self.coin_operator(), self._block_rows())
+            return
+        self.position_states = apply_coin_field(self.coin_operator(), self.position_states)
 
     def apply_boundary_conditions(self, condition='periodic'):
         if condition == 'periodic':
@@ -64,11 +268,11 @@ class MultiDimensionalQuantumWalk:
             self.position_states[(slice(None),) + (-1,) + (slice(None),) * (self.dimensions - 1)] = 0
 
     def apply_decoherence(self, rate=0.01):
-        noise = np.random.normal(0, rate, self.position_states.shape)
-        self.position_states += noise.astype(complex)
+        noise = self.rng.standard_normal(self.position_states.shape, dtype=self.position_states.real.dtype)
+        noise *= rate
+        self.position_states += noise
         # Normalize the state to ensure it remains a valid quantum state
-        norm = np.sqrt(np.sum(np.abs(self.position1_states)**2))
-        self.position_states /= norm
+        normalize_state(self.position_states)
 
     def time_dependent_coin(self, step):
         theta = step * np.pi / 20  # Example of gradually changing the coin angle
@@ -91,42 +295,49 @@ class MultiDimensionalQuantumWalk:
             plt.ylabel('Probability')
         plt.show()
 
+    def apply_quantum_fourier_transform(self, inverse=False, workers=None, overwrite_x=False):
+        """ Apply the unitary Quantum Fourier Transform (or its inverse) over all position axes with an FFT. """
+        from scipy import fft
+        transform = fft.ifftn if inverse else fft.fftn
+        axes = tuple(range(1, self.dimensions + 1))
+        self.position_states = transform(self.position_states, axes=axes, norm='ortho', workers=workers, overwrite_x=overwrite_x)
+        if self.active_window is not None:
+            self.enable_active_window(self.window_epsilon)
+
     def calculate_entanglement_entropy(self):
-        from scipy.linalg import svdvals
-        reshaped_state = self.position_states.reshape((2 ** (self.dimensions // 2), -1))
-        singular_values = svdvals(reshaped_state)
-        probabilities = singular_values**2
-        entropy = -np.sum(probabilities * np.log(probabilities + 1e-10))  # Added a small constant to avoid log(0)
-        return entropy
+        # Coin-position entropy from the 2x2 reduced coin matrix, without decomposing the full state
+        return coin_entanglement_entropy(self.position_states)
 
     def apply_spatially_varying_coins(self):
-        # Example of a spatially varying Hadamard coin
-        for index, _ in np.ndenumerate(self.position_states[0]):
-            if sum(index) % 2 == 0:
-                H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
-            else:
-                H = np.array([[1, -1], [1, 1]]) / np.sqrt(2)
-            self.position_states[:, index] = np.dot(H, self.position_states[:, index])
+        # Example of a spatially varying Hadamard coin, built once per grid as a checkerboard coin field
+        cached_shape, field = getattr(self, '_checkerboard_coins', (None, None))
+        if cached_shape != self.grid_shape:
+            H_even = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
+            H_odd = np.array([[1, -1], [1, 1]]) / np.sqrt(2)
+            even = (np.sum(np.indices(self.grid_shape), axis=0) % 2 == 0)[..., np.newaxis, np.newaxis]
+            field = np.where(even, H_even, H_odd).astype(self.dtype)
+            self._checkerboard_coins = (self.grid_shape, field)
+        self.position_states = apply_coin_field(field, self.position_states)
 
     def dynamic_rewiring(self, step):
         if step % 10 == 0:
             # Randomly switch some connections every 10 steps
-            self.grid_shape = np.random.permutation(self.grid_shape)
+            self.grid_shape = self.rng.permutation(self.grid_shape)
 
     def measure_and_collapse(self):
         # Choose a random position to measure
-        random_position = tuple(np.random.randint(0, self.size) for _ in range(self.dimensions))
+        random_position = tuple(self.rng.integers(0, self.size) for _ in range(self.dimensions))
         probabilities = np.abs(self.position_states[:, random_position])**2
-        outcome = np.random.choice([0, 1], p=probabilities/probabilities.sum())
+        outcome = self.rng.choice([0, 1], p=probabilities/probabilities.sum())
         # Collapse the wave function at the measured position
         collapsed_state = np.zeros_like(self.position_states)
         collapsed_state[outcome, random_position] = 1
         self.position_states = collapsed_state
 
     def interactive_parameter_adjustment(self, new_coin_type=None, new_boundary_condition=None):
-        if new_coin_type is not missing:
+        if new_coin_type is not None:
             self.coin_type = new_coin_type
-        if new_boundary_condition is not missing:
+        if new_boundary_condition is not None:
             self.boundary_condition = new_boundary_condition
         # Apply the new settings in the next simulation step
 
@@ -185,8 +396,7 @@ class MultiDimensionalQuantumWalk:
                 self.position_states[:, obs] = 0  # Setting the state to zero at obstacles
 
         if potential_map is not None:
-            for index, potential in np.ndenumerate(promising_space):
-                self.position_states[:, index] *= np.exp(-1j * potential)
+            self.position_states *= np.exp(-1j * compile_field(potential_map, self.grid_shape)).astype(self.dtype)
 
     def reconstruct_quantum_state(self, num_measurements=100):
         from scipy.linalg import lstsq
@@ -203,31 +413,20 @@ class MultiDimensionalQuantumWalk:
         return reconstructed_state
 
     def calculate_transition_matrix(self):
-        size = self.size ** self.dimensions
-        transition_matrix = np.zeros((size, size), dtype=complex)
-        
-        # Temporarily save the current state
-        saved_state = self.position_states.copy()
+        """
+        Return the one-step walk operator as a scipy.sparse CSR matrix over the flattened (k, *grid) state.
 
-        # Fill in the transition matrix
-        for i in range(size):
-            self.position_states = np.zeros_like(self.position_states)
-            self.position_states.ravel()[i] = 1
-            self.step()
-            transition_matrix[:, i] = self.position_states.ravel()
+        The matrix is built directly from the coin (or coin field), potential, displacements and
+        boundary condition, so U @ position_states.ravel() equals one step(). Operators are cached,
+        so repeated calls with an unchanged walk are free; the cached matrix is read-only, so .copy() it to edit it.
+        """
+        return walk_operator(self.coin_operator(), self.displacements, self.grid_shape, self.boundary_condition,
+                             self.potential_phases, self.dtype)
 
-        # Restore the original state
-        self.position_states = saved_state
-        return transition_matrix
-    
     def apply_interaction_potential(self):
         """ Apply interaction potential between different positions. """
-        potential_matrix = np.zeros_like(self.position_states)
-        # Example: nearest-neighbor interaction
-        for idx in np.ndindex(self.position_states.shape[1:]):
-            neighbors = [tuple(map(sum, zip(idx, delta))) for delta in [(1, 0), (-1, 0), (0, 1), (0, -1)] if 0 <= sum(zip(idx, delta)) < self.size]
-            for neighbor in neighbors:
-                potential_matrix[:, idx] += self.position_states[:, neighbor]
+        # Example: nearest-neighbor interaction, summed with a stencil over the lattice axes
+        potential_matrix = neighbor_sum(self.position_states, self.boundary_condition, axes=range(1, self.dimensions + 1))
         # Apply the interaction potential phase
         self.position_states *= np.exp(-1j * 0.1 * potential_matrix)
 
@@ -270,10 +469,8 @@ class MultiDimensionalQuantumWalk:
             self.position_states = np.roll(self.position_states, shift_direction, axis=axis)
 
     def apply_interactive_potential(self, potential_function):
-        """ Apply a user-defined potential function to the quantum walk. """
-        for idx in np.ndindex(*self.grid_shape):
-            potential_value = potential_function(idx)
-            self.position_states[:, idx] *= np.exp(-1j * potential_value)
+        """ Apply a user-defined potential function (or array) to the quantum walk, evaluated once over the whole grid. """
+        self.position_states *= np.exp(-1j * compile_field(potential_function, self.grid_shape)).astype(self.dtype)
 
     def measurement_based_evolution(self):
         """ Adjust the walk dynamics based on measurement outcomes, implementing a form of quantum feedback. """
@@ -293,32 +490,28 @@ class MultiDimensionalQuantumWalk:
 
     def conditional_entanglement(self, threshold=0.1):
         """ Entangle positions conditionally based on a probability threshold. """
-        probabilities = np.abs(self.position_states)**2
-        for idx in np.ndindex(self.grid_shape):
-            if probabilities[idx] > threshold:
-                # Find neighboring indices to entangle with
-                neighbors = [tuple(map(sum, zip(idx, delta))) for delta in [(1, 0), (-1, 0), (0, 1), (0, -1)] if 0 <= sum(map(sum, zip(idx, delta))) < self.size]
-                for neighbor in neighbors:
-                    # Simple phase entanglement
-                    self.position_states[:, idx] *= np.exp(1j * np.pi / 4)
-                    self.position_states[:, neighbor] *= np.exp(-1j * np.pi / 4)
+        marked = (self.measure() > threshold).astype(float)
+        # Simple phase entanglement: each marked site gains pi/4 per neighbour, and each neighbour loses pi/4
+        degrees = neighbor_sum(np.ones(self.grid_shape), self.boundary_condition)
+        phases = np.pi / 4 * (marked * degrees - neighbor_sum(marked, self.boundary_condition))
+        self.position_states *= np.exp(1j * phases).astype(self.dtype)
 
     def simulate_quantum_diffusion(self):
         """
         Simulate diffusion process in the quantum walk, adjusting amplitude distribution based on neighboring state values.
         """
         diffusion_rate = 0.05
-        for idx in np.ndindex(*self.grid_shape):
-            neighbor_sum = sum(self.position_states[:, np.clip(np.array(idx) + np.array(offset), 0, self.size - 1)] 
-                            for offset in [(1, 0), (-1, 0), (0, 1), (0, -1)])
-            self.position_states[:, idx] += diffusion_rate * (neighbor_commit - 4 * self.position_states[:, idx])
+        # Discrete Laplacian of every coin component over the lattice axes
+        laplacian = neighbor_sum(self.position_states, self.boundary_condition, axes=range(1, self.dimensions + 1))
+        laplacian -= 2 * self.dimensions * self.position_states
+        self.position_states += diffusion_rate * laplacian
 
     def quantum_coherence_preservation(self):
         """
         Apply techniques to preserve quantum coherence over time, potentially using error-correcting codes or decoherence-free subspaces.
         """
         # Simple error correction via repeated redundancy
-        error_indices = np.random.choice([True, False], self.position_states.shape, p=[0.01, 0.99])
+        error_indices = self.rng.choice([True, False], self.position_states.shape, p=[0.01, 0.99])
         self.position_states[:, error_indices] = self.position_states[:, np.invert(error_indices)]
 
     def implement_quantum_routing(self):
@@ -331,13 +524,13 @@ class MultiDimensionalQuantumWalk:
             high_interference_indices = interference_pattern > np.mean(interference_pattern)
             self.position_states[:, high_interference_indices] *= 1.1  # Enhance amplitude along high interference paths
 
-    def quantum_walk_oracle(self, condition_function):
+    def quantum_walk_oracle(self, condition_function, cache=False):
         """
         Implement a quantum oracle within the walk, marking certain states according to a condition function.
+        With cache=True a pure condition function is compiled to a mask only once (see oracles.compile_oracle).
         """
-        for idx in np.ndindex(*self.grid_spe):
-            if condition_function(idx):
-                self.position_states[:, idx] *= -1  # Apply phase flip to mark the state
+        mask = compile_oracle(condition_function, self.position_states.shape[1:], cache)
+        np.negative(self.position_states, out=self.position_states, where=mask)  # Apply phase flip to mark the states
 
     def spatial_entropy_measurement(self):
         """
@@ -357,7 +550,7 @@ class MultiDimensionalQuantumWalk:
         if current_entropy < target_entropy:
             self.dimensions += 1  # Increase dimensionality
             self.grid_shape = (self.size,) * self.dimensions
-            self.position_states = np.resize(self.position_states, (2,) + self.grid_shape)
+            self.position_states = np.resize(self.position_states, (self.coin_dimension,) + self.grid_shape)
         elif current_entropy > target_entropy and self.dimensions > 1:
             self.dimensions -= 1  # Decrease dimensionality
             self.grid_shape = (self.size,) * self.dimensions
@@ -367,13 +560,14 @@ class MultiDimensionalQuantumWalk:
         """
         Simulate interference effects specifically focusing on multi-particle scenarios within the quantum walk framework.
         """
-        for idx in np.ndindex(*self.grid_shape):
-            for another_idx in np.ndindex(*self.grid_shape):
-                if idx != another_idx:
-                    # Calculate phase interference between different particles
-                    phase_difference = np.angle(self.position_states[0, idx]) - np.angle(self.position_states[1, another_idx])
-                    interference_intensity = np.cos(phase_difference)
-                    self.position_states[:, idx] *= interference_intensity
+        # Mean over all other sites y of cos(phase_0(x) - phase_1(y)). By the sum-of-cosines identity this is
+        # Re(exp(i phase_0(x)) * (S - exp(-i phase_1(x)))) / (M - 1) with S = sum_y exp(-i phase_1(y)), so O(M) overall
+        phase_factors_0 = np.exp(1j * np.angle(self.position_states[0]))
+        conjugate_phase_factors_1 = np.exp(-1j * np.angle(self.position_states[1]))
+        total = np.sum(conjugate_phase_factors_1)
+        num_sites = conjugate_phase_factors_1.size
+        interference_intensity = np.real(phase_factors_0 * (total - conjugate_phase_factors_1)) / max(num_sites - 1, 1)
+        self.position_states *= interference_intensity.astype(self.position_states.real.dtype)
 
     def quantum_walk_memory_effects(self):
         """
@@ -395,15 +589,15 @@ class MultiDimensionalQuantumWalk:
         Visualize the quantum wavefront propagation in real-time to analyze how the wave function evolves spatially over time.
         """
         fig, ax = plt.subplots()
-        prob_distribution = np.abs(self.position_states[0])**2 + np.abs(self.position_states[1])**2
+        prob_distribution = self.measure()
         im = ax.imshow(prob_distribution, cmap='viridis', interpolation='nearest', animated=True)
         plt.colorbar(im, ax=ax)
         ax.set_title('Quantum Walk Evolution')
 
         def update(frame):
             self.step()
-            prob_distribution = np.abs(self.position_states[0])**2 + np.abs(self.position_states[1])**2
-            im.set_array(prob_saftition)
+            prob_distribution = self.measure()
+            im.set_array(prob_distribution)
             ax.set_title(f"Step {frame + 1}")
             return im,
 
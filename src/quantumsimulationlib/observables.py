@@ -0,0 +1,41 @@
+import numpy as np
+
+def walker_amplitudes(walker):
+    """ Return the (k, *grid) amplitude array of a walker, or the argument itself if it is already an array. """
+    if isinstance(walker, np.ndarray):
+        return walker
+    if hasattr(walker, 'position_state'):
+        return walker.position_state
+    return walker.position_states
+
+def coin_density_matrix(state):
+    """
+    Return the reduced density matrix of the coin (internal) degree of freedom.
+
+    The position is traced out directly from the amplitudes, rho_ij = sum_x psi_i(x) psi_j(x)*,
+    which takes O(k^2 N) time and O(k^2) memory instead of forming the full density matrix.
+    Accepts a (k, *grid) array or any walker object.
+    """
+    amplitudes = walker_amplitudes(state)
+    flat = amplitudes.reshape(amplitudes.shape[0], -1)
+    density_matrix = flat @ flat.conj().T
+    return density_matrix / np.trace(density_matrix).real
+
+def von_neumann_entropy(density_matrix):
+    eigenvalues = np.linalg.eigvalsh(density_matrix)
+    eigenvalues = eigenvalues[eigenvalues > 0]  # Filter out zero eigenvalues to avoid log(0)
+    return float(-np.sum(eigenvalues * np.log(eigenvalues)))
+
+def coin_entanglement_entropy(state):
+    """
+    Return the coin-position entanglement entropy of a pure walker state.
+
+    By the Schmidt decomposition the reduced coin and position density matrices share their
+    nonzero spectrum, so the small coin matrix is enough.
+    """
+    return von_neumann_entropy(coin_density_matrix(state))
+
+def coin_purity(state):
+    """ Return Tr(rho_coin^2), which is 1 for a product state and 1/k for a maximally entangled one. """
+    density_matrix = coin_density_matrix(state)
+    return float(np.real(np.sum(density_matrix * density_matrix.T)))
@@ -0,0 +1,55 @@
+import weakref
+import numpy as np
+from .utils import evaluate_on_grid
+
+# Masks compiled from callables with cache=True, per grid shape, for as long as the callable is alive
+_compiled_masks = weakref.WeakKeyDictionary()
+
+def compile_oracle(oracle, grid_shape, cache=False):
+    """
+    Compile an oracle into a boolean mask of the marked positions.
+
+    Args:
+        oracle: A boolean mask shaped like the grid; an integer array of flat positions or of
+            (num_marked, d) coordinates; or a predicate. Predicates are first called once with the
+            coordinate arrays (an array of positions in 1D, a tuple of arrays otherwise) and, if that
+            does not return a mask, called once per position with an int (1D) or an index tuple.
+        grid_shape (tuple): The shape of the position grid.
+        cache (bool): Keep the mask compiled from a predicate and reuse it whenever the same callable
+            is passed again. Only use this for pure predicates that depend on nothing but the position;
+            a predicate reading state that changes between calls would get a stale mask.
+
+    Returns:
+        np.ndarray: A boolean array shaped `grid_shape`.
+    """
+    grid_shape = tuple(grid_shape)
+    if not callable(oracle):
+        return _mask_from_array(np.asarray(oracle), grid_shape)
+    if not cache:
+        return evaluate_on_grid(oracle, grid_shape).astype(bool)
+    try:
+        cached = _compiled_masks.get(oracle)
+    except TypeError:
+        cached = None
+    if cached is not None and grid_shape in cached:
+        return cached[grid_shape]
+    mask = evaluate_on_grid(oracle, grid_shape).astype(bool)
+    try:
+        _compiled_masks.setdefault(oracle, {})[grid_shape] = mask
+    except TypeError:
+        pass  # Callables that cannot be weakly referenced are compiled on every call
+    return mask
+
+def _mask_from_array(oracle, grid_shape):
+    if oracle.dtype == bool:
+        if oracle.shape != grid_shape:
+            raise ValueError("Boolean oracle masks must match the grid shape {}.".format(grid_shape))
+        return oracle
+    if not np.issubdtype(oracle.dtype, np.integer):
+        raise TypeError("Oracles must be boolean masks, integer index arrays or callables.")
+    mask = np.zeros(grid_shape, dtype=bool)
+    if oracle.ndim == 2 and len(grid_shape) > 1:
+        mask[tuple(oracle.T)] = True
+    else:
+        mask.reshape(-1)[oracle.ravel()] = True
+    return mask
@@ -0,0 +1,129 @@
+import os
+import numpy as np
+from .coins import apply_coin_field
+from .utils import shift_components
+
+def create_state_file(path, shape, dtype):
+    """ Create a zero-filled (k, *grid) state array backed by a file on disk. """
+    return np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+
+def block_rows(state_shape, itemsize, block_bytes):
+    """ Return how many slabs along the first lattice axis fit in one block of `block_bytes`. """
+    slab_bytes = itemsize * state_shape[0] * int(np.prod(state_shape[2:]))
+    return max(1, block_bytes // slab_bytes)
+
+def stream_step(source, target, coin, displacements, rows_per_block, phases=None, buffers=None):
+    """
+    Apply potential phases, coin and periodic shift from `source` into `target`, streaming slabs of the first lattice axis.
+
+    Each block of rows is read together with a halo of neighbouring slabs from the adjacent blocks,
+    so every block is coined and shifted entirely in memory; only one block plus its halo is
+    resident at a time. `coin` may be None to shift only.
+
+    Args:
+        source (np.ndarray): The (k, *grid) state, usually a np.memmap.
+        target (np.ndarray): A separate array of the same shape that receives the result.
+        coin (np.ndarray): A uniform (k, k) coin, a (*grid, k, k) coin field, or None.
+        displacements (np.ndarray): The (k, d) lattice displacement of each coin component.
+        rows_per_block (int): The number of first-axis slabs per block.
+        phases (np.ndarray): Optional (*grid,) on-site phase factors applied before the coin.
+        buffers (dict): Optional scratch buffers kept between calls (see step_rows).
+    """
+    buffers = {} if buffers is None else buffers
+    for start in range(0, source.shape[1], rows_per_block):
+        step_rows(source, target, coin, displacements, start, min(start + rows_per_block, source.shape[1]), phases, buffers)
+    if isinstance(target, np.memmap):
+        target.flush()
+
+def step_rows(source, target, coin, displacements, start, stop, phases=None, buffers=None):
+    """
+    Phase, coin and periodically shift first-axis rows start..stop of `target`, reading them and their halo from `source`.
+
+    The rows and halo are copied in at most three contiguous pieces into a scratch slab, coined into
+    a second scratch slab and shifted straight into `target` with shift_components. Pass the same
+    `buffers` dict on every call to reuse the two slabs instead of allocating them per block.
+    """
+    size = source.shape[1]
+    halo = int(np.max(np.abs(displacements[:, 0])))
+    buffers = {} if buffers is None else buffers
+    shape = (source.shape[0], stop - start + 2 * halo) + source.shape[2:]
+    slab = _scratch(buffers, 'slab', shape, source.dtype)
+    # Rows start - halo .. stop + halo wrap around the periodic first axis
+    pieces = []
+    row = start - halo
+    while row < stop + halo:
+        first = row % size
+        count = min(stop + halo - row, size - first)
+        pieces.append((row - start + halo, first, count))
+        slab[:, row - start + halo:row - start + halo + count] = source[:, first:first + count]
+        if phases is not None:
+            slab[:, row - start + halo:row - start + halo + count] *= phases[first:first + count]
+        row += count
+    if coin is not None:
+        coined = _scratch(buffers, 'coined', shape, source.dtype)
+        if np.ndim(coin) == 2:
+            apply_coin_field(coin, slab, out=coined)
+        else:
+            for offset, first, count in pieces:
+                apply_coin_field(coin[first:first + count], slab[:, offset:offset + count], out=coined[:, offset:offset + count])
+        slab = coined
+    for component, displacement in enumerate(displacements):
+        offset = halo - int(displacement[0])
+        # The first-axis move is the halo offset; the other axes wrap inside the rows
+        in_rows = np.concatenate(([0], displacement[1:]))[np.newaxis]
+        shift_components(slab[component:component + 1, offset:offset + stop - start], target[component:component + 1, start:stop], in_rows)
+
+def _scratch(buffers, name, shape, dtype):
+    """ Return the scratch array `name` of this shape and dtype from `buffers`, allocating it on first use. """
+    key = (name, shape, np.dtype(dtype))
+    if key not in buffers:
+        buffers[key] = np.empty(shape, dtype=dtype)
+    return buffers[key]
+
+def stream_coin(state, coin, rows_per_block):
+    """ Apply a uniform coin or a (*grid, k, k) coin field to a (k, *grid) state in place, one block of first-axis slabs at a time. """
+    for start in range(0, state.shape[1], rows_per_block):
+        block = state[:, start:start + rows_per_block]
+        block[...] = apply_coin_field(coin if np.ndim(coin) == 2 else coin[start:start + rows_per_block], block)
+    if isinstance(state, np.memmap):
+        state.flush()
+
+def stream_probabilities(state, rows_per_block, keep_axes=None, out=None):
+    """
+    Return the position probabilities of a (k, *grid) state, computed block by block.
+
+    Args:
+        state (np.ndarray): The walker state, usually a np.memmap.
+        rows_per_block (int): The number of first-axis slabs per block.
+        keep_axes (tuple): Lattice axes to keep; the others are summed out to give a marginal. None keeps all.
+        out (np.ndarray): Optional array (for example a np.memmap) that receives the result.
+
+    Returns:
+        np.ndarray: The probabilities, or the marginal over `keep_axes`.
+    """
+    grid_shape = state.shape[1:]
+    keep_axes = tuple(range(len(grid_shape))) if keep_axes is None else tuple(sorted(keep_axes))
+    summed_axes = tuple(axis for axis in range(len(grid_shape)) if axis not in keep_axes)
+    out_shape = tuple(grid_shape[axis] for axis in keep_axes)
+    if out is None:
+        out = np.zeros(out_shape, dtype=state.real.dtype)
+    elif out.shape != out_shape:
+        raise ValueError("The output array must be shaped {}.".format(out_shape))
+    elif 0 not in keep_axes:
+        out[...] = 0
+    for start in range(0, grid_shape[0], rows_per_block):
+        stop = min(start + rows_per_block, grid_shape[0])
+        block = np.sum(np.abs(state[:, start:stop])**2, axis=0)
+        if summed_axes:
+            block = np.sum(block, axis=summed_axes)
+        if 0 in keep_axes:
+            out[start:stop] = block
+        else:
+            out += block
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+def state_file_paths(directory):
+    """ Return the two ping-pong state file paths used inside a memmap directory. """
+    return os.path.join(directory, 'state_0.dat'), os.path.join(directory, 'state_1.dat')
@@ -0,0 +1,217 @@
+import numpy as np
+from .coins import coin_matrix
+from .stepping import StepIteratorMixin
+from .utils import complex_dtype, spawn_generators
+
+class QuantumWalkBatch(StepIteratorMixin):
+    """
+    Evolve many independent line walks as one (batch_size, 2, num_positions) array.
+
+    Each walker has its own start position, 2x2 coin, boundary condition and decoherence rate,
+    and one call to step() advances all of them with a handful of vectorized operations.
+    """
+    # measure() has a leading walker axis, which iter_steps keeps out of the position reductions
+    batch_axes = 1
+
+    def __init__(self, num_positions, start_positions, coins='Hadamard', boundaries='periodic', decoherence_rates=0.02, seed=None, dtype=complex):
+        start_positions = np.atleast_1d(start_positions)
+        self.num_positions = num_positions
+        self.batch_size = len(start_positions)
+        self.dtype = complex_dtype(dtype)
+        self.position_states = np.zeros((self.batch_size, 2, num_positions), dtype=self.dtype)
+        self.position_states[np.arange(self.batch_size), 0, start_positions] = 1
+        self.coins = self._coin_tensor(coins)
+        self.set_boundaries(boundaries)
+        self.decoherence_rates = np.broadcast_to(np.asarray(decoherence_rates, dtype=float), (self.batch_size,)).copy()
+        self.noise_model = 'gaussian'
+        self.set_seed(seed)
+
+    @classmethod
+    def from_walks(cls, walks, boundaries='periodic'):
+        """ Build a batch from QuantumWalk instances, copying their states, coins and decoherence rates. """
+        coins = np.array([walk.current_coin() for walk in walks])
+        if coins.shape[1:] != (2, 2):
+            raise ValueError("Only walks with a uniform 2x2 coin can be batched.")
+        batch = cls(walks[0].num_positions, np.zeros(len(walks), dtype=int), coins, boundaries,
+                     [walk.decoherence_rate for walk in walks], dtype=walks[0].position_state.dtype)
+        batch.position_states = np.array([walk.position_state for walk in walks], dtype=batch.dtype)
+        return batch
+
+    def set_seed(self, seed):
+        """
+        Give every walker its own random stream.
+
+        `seed` may be None, an int, a SeedSequence or a Generator, from which one child stream is spawned
+        per walker, or a sequence with one seed or Generator per walker. Walker i then draws exactly the
+        noise a single-walker batch seeded with its stream would draw, so any walker can be rerun alone.
+        """
+        if isinstance(seed, (list, tuple)):
+            if len(seed) != self.batch_size:
+                raise ValueError("One seed is needed per walker.")
+            self.rngs = [np.random.default_rng(walker_seed) for walker_seed in seed]
+        else:
+            self.rngs = spawn_generators(seed, self.batch_size)
+
+    def _standard_normal(self, walker_shape):
+        """ Draw a (batch_size, *walker_shape) array of standard normals, each walker from its own stream. """
+        samples = np.empty((self.batch_size,) + walker_shape, dtype=self.position_states.real.dtype)
+        for walker_samples, rng in zip(samples, self.rngs):
+            rng.standard_normal(out=walker_samples, dtype=walker_samples.dtype)
+        return samples
+
+    def _coin_tensor(self, coins):
+        """ Expand a coin type, a 2x2 matrix or one coin per walker into a (batch_size, 2, 2) tensor. """
+        if isinstance(coins, str):
+            coins = coin_matrix(coins)
+        elif not isinstance(coins, np.ndarray):
+            coins = np.array([coin_matrix(coin) if isinstance(coin, str) else coin for coin in coins])
+        coins = np.asarray(coins, dtype=complex)
+        if coins.shape not in ((2, 2), (self.batch_size, 2, 2)):
+            raise ValueError("Coins must be a 2x2 matrix or shaped (batch_size, 2, 2).")
+        return np.broadcast_to(coins, (self.batch_size, 2, 2)).astype(self.dtype)
+
+    def set_boundaries(self, boundaries):
+        """ Set one boundary condition for all walkers or a sequence with one per walker. """
+        if isinstance(boundaries, str):
+            boundaries = [boundaries] * self.batch_size
+        if len(boundaries) != self.batch_size:
+            raise ValueError("One boundary condition is needed per walker.")
+        for boundary in boundaries:
+            if boundary not in ('periodic', 'reflective'):
+                raise ValueError("Unsupported boundary condition")
+        self.boundaries = list(boundaries)
+        self.reflective = np.array([boundary == 'reflective' for boundary in boundaries])
+
+    def prepare_uniform_superposition(self):
+        """ Put every walker in the equal superposition of all coin and position states, the usual start of a search. """
+        self.position_states = np.full((self.batch_size, 2, self.num_positions), 1 / np.sqrt(2 * self.num_positions), dtype=self.dtype)
+
+    def apply_coin(self):
+        self.position_states = np.matmul(self.coins, self.position_states)
+
+    def apply_decoherence(self, model=None):
+        """
+        Apply one random realization of the noise model to every walker, then normalize every walker.
+
+        The models match QuantumWalk: 'gaussian' adds complex Gaussian noise, 'phase' multiplies by random
+        phases, 'amplitude' by random real factors, and 'depolarizing' replaces the coin state at each
+        position with a random one with probability equal to the walker's rate. Defaults to `noise_model`.
+        """
+        model = self.noise_model if model is None else model
+        rates = self.decoherence_rates[:, np.newaxis, np.newaxis]
+        shape = self.position_states.shape
+        if not np.any(self.decoherence_rates):
+            pass  # Every model is the identity at zero rate, so skip drawing noise
+        elif model == 'gaussian':
+            noise = self._standard_normal((2, 2 * self.num_positions)).view(self.dtype)
+            noise *= rates
+            self.position_states += noise
+        elif model == 'phase':
+            self.position_states *= np.exp(1j * rates * self._standard_normal(shape[1:]))
+        elif model == 'amplitude':
+            self.position_states *= 1 + rates * self._standard_normal(shape[1:])
+        elif model == 'depolarizing':
+            for walker, rng in enumerate(self.rngs):
+                positions = np.flatnonzero(rng.random(self.num_positions) < self.decoherence_rates[walker])
+                random_states = rng.standard_normal((len(positions), 4), dtype=self.position_states.real.dtype).view(self.dtype)
+                random_states /= np.linalg.norm(random_states, axis=1, keepdims=True)
+                self.position_states[walker][:, positions] = random_states.T
+        else:
+            raise ValueError("Unsupported noise model")
+        norms = np.sqrt(np.sum(np.abs(self.position_states)**2, axis=(1, 2)))
+        self.position_states /= norms[:, np.newaxis, np.newaxis]
+
+    def shift(self):
+        self.position_states = self._shifted(self.position_states, self.reflective)
+
+    @staticmethod
+    def _shifted(states, reflective):
+        """ Return a stack of (2, N) states moved one site, with the edge amplitudes set by each walker's boundary. """
+        new_states = np.empty_like(states)
+        new_states[:, 0, 1:] = states[:, 0, :-1]
+        new_states[:, 1, :-1] = states[:, 1, 1:]
+        # Only the two edge amplitudes depend on each walker's boundary condition
+        new_states[:, 0, 0] = np.where(reflective, states[:, 1, 0], states[:, 0, -1])
+        new_states[:, 1, -1] = np.where(reflective, states[:, 0, -1], states[:, 1, 0])
+        return new_states
+
+    def step(self):
+        self.apply_coin()
+        self.apply_decoherence()
+        self.shift()
+
+    def measure(self):
+        """ Return the (batch_size, num_positions) matrix of position probabilities. """
+        return np.sum(np.abs(self.position_states)**2, axis=1)
+
+
+    def search(self, marked, max_steps=None, peak_threshold=0.0):
+        """
+        Run a coined search with one marked set per walker and stop each walker at its first success peak.
+
+        Every iteration applies coin and shift, flips the phase of the marked positions and applies
+        coin and shift again, as in QuantumWalk.quantum_walk_search, but for all walkers at once.
+        Walkers are frozen at their first local maximum of success probability above `peak_threshold`,
+        so later iterations only evolve the walkers that are still searching.
+
+        Args:
+            marked: One target position per walker, or a (batch_size, num_positions) boolean mask of marked sets.
+            max_steps (int): The iteration limit; defaults to num_positions.
+            peak_threshold (float): Local maxima at or below this success probability are ignored.
+
+        Returns:
+            dict: 'success_probabilities' (max_steps + 1, batch_size) traces, NaN after a walker stops;
+            'hitting_times' and 'peak_probabilities' per walker; 'reached_peak' flags walkers that peaked
+            before max_steps (the others report their best step and keep their final state); and the mean,
+            median and standard deviation of the hitting times.
+        """
+        marked = np.asarray(marked)
+        if marked.dtype != bool:
+            if marked.shape != (self.batch_size,):
+                raise ValueError("Give one target per walker or a (batch_size, num_positions) boolean mask.")
+            mask = np.zeros((self.batch_size, self.num_positions), dtype=bool)
+            mask[np.arange(self.batch_size), marked] = True
+            marked = mask
+        if marked.shape != (self.batch_size, self.num_positions):
+            raise ValueError("Marked sets must be shaped (batch_size, num_positions).")
+        if max_steps is None:
+            max_steps = self.num_positions
+        phases = np.where(marked, -1.0, 1.0)[:, np.newaxis, :]
+
+        def success_probability(states, walkers):
+            return np.sum(np.sum(np.abs(states)**2, axis=1) * marked[walkers], axis=1)
+
+        traces = np.full((max_steps + 1, self.batch_size), np.nan)
+        traces[0] = success_probability(self.position_states, slice(None))
+        hitting_times = np.zeros(self.batch_size, dtype=int)
+        reached_peak = np.zeros(self.batch_size, dtype=bool)
+        active = np.arange(self.batch_size)
+        for step in range(1, max_steps + 1):
+            previous_states = self.position_states[active]
+            coins, reflective = self.coins[active], self.reflective[active]
+            states = self._shifted(np.matmul(coins, previous_states), reflective)
+            states *= phases[active]
+            states = self._shifted(np.matmul(coins, states), reflective)
+            probabilities = success_probability(states, active)
+            traces[step, active] = probabilities
+            # A walker has peaked once its success probability falls after a step above the threshold
+            previous_probabilities = traces[step - 1, active]
+            peaked = (probabilities < previous_probabilities) & ~np.isclose(probabilities, previous_probabilities, rtol=1e-9, atol=1e-12)
+            peaked &= previous_probabilities > peak_threshold
+            self.position_states[active] = np.where(peaked[:, np.newaxis, np.newaxis], previous_states, states)
+            hitting_times[active[peaked]] = step - 1
+            reached_peak[active[peaked]] = True
+            active = active[~peaked]
+            if active.size == 0:
+                break
+        hitting_times[active] = np.nanargmax(traces[:, active], axis=0)
+        peak_probabilities = traces[hitting_times, np.arange(self.batch_size)]
+        return {
+            'success_probabilities': traces,
+            'hitting_times': hitting_times,
+            'peak_probabilities': peak_probabilities,
+            'reached_peak': reached_peak,
+            'mean_hitting_time': float(np.mean(hitting_times)),
+            'median_hitting_time': float(np.median(hitting_times)),
+            'std_hitting_time': float(np.std(hitting_times)),
+        }
@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
 import numpy as np
-from quantum_walk import QuantumWalk
+from .quantum_walk import QuantumWalk
 
 class QuantumCoinGUI:
     def __init__(self, master):
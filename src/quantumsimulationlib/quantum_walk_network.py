@@ -4,18 +4,26 @@ import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import plotly.graph_objects as go
 from ipywidgets import interact, FloatSlider
-
-class QuantumWalkOnNetwork:
-    def __init__(self, num_nodes, graph_type='random', p=0.1, coin_type='Hadamard'):
+from .coins import apply_coin_field, coin_matrix, coin_operation_matrix
+from .continuous_time import graph_hamiltonian
+from .history import HistoryRecorder
+from .spectral_cache import default_spectral_cache
+from .stepping import StepIteratorMixin
+from .utils import complex_dtype, graph_seed
+
+class QuantumWalkOnNetwork(StepIteratorMixin):
+    def __init__(self, num_nodes, graph_type='random', p=0.1, coin_type='Hadamard', seed=None, dtype=complex):
+        self.rng = np.random.default_rng(seed)
+        self.dtype = complex_dtype(dtype)
         self.num_nodes = num_nodes
         self.coin_type = coin_type
         # Initialize graph
         if graph_type == 'random':
-            self.graph = nx.gnp_random_graph(num_nodes, p)
+            self.graph = nx.gnp_random_graph(num_nodes, p, seed=graph_seed(self.rng))
         elif graph_type == 'small_world':
-            self.graph = nx.watts_strogatz_graph(num_nodes, k=4, p=p)
+            self.graph = nx.watts_strogatz_graph(num_nodes, k=4, p=p, seed=graph_seed(self.rng))
         elif graph_type == 'scale_free':
-            self.graph = nx.barabasi_albert_graph(num_nodes, m=2)
+            self.graph = nx.barabasi_albert_graph(num_nodes, m=2, seed=graph_seed(self.rng))
         else:
             raise ValueError("Unsupported graph type")
 
@@ -23,24 +31,21 @@ class QuantumWalkOnNetwork:
         self.adjacency_matrix = nx.adjacency_matrix(self.graph).toarray()
 
         # Initialize position states in superposition
-        self.position_states = np.zeros((2, num_nodes), dtype=complex)
+        self.position_states = np.zeros((2, num_nodes), dtype=self.dtype)
         for node in range(num_nodes):
             self.position_states[0, node] = 1 / np.sqrt(num_nodes)
             self.position_states[1, node] = 1 / np.sqrt(num_nodes)
 
     def apply_coin(self):
         H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
-        for node in range(self.num_nodes):
-            self.position_states[:, node] = np.dot(H, self.position_states[:, node])
+        self.position_states = apply_coin_field(H, self.position_states)
 
     def shift(self):
-        new_state = np.zeros_like(self.position_states)
-        for node in range(self.num_nodes):
-            connected_nodes = self.adjacency_matrix[node]
-            for connected_node, presence in enumerate(connected_nodes):
-                if presence:
-                    new_state[:, connected_node] += self.position_states[:, node]
-        self.position_states = new_state / np.sqrt(np.sum(self.adjacency_matrix, axis=1, keepdims=True))
+        # Every node passes its amplitudes to all of its neighbours, scaled by the receiving node's degree
+        new_state = self.position_states @ self.adjacency_matrix
+        degrees = np.sum(self.adjacency_matrix, axis=1)
+        # Isolated nodes receive nothing, so leave their (zero) amplitudes unscaled
+        self.position_states = (new_state / np.sqrt(np.maximum(degrees, 1))).astype(self.dtype, copy=False)
 
     def step(self):
         self.apply_coin()
@@ -49,6 +54,7 @@ class QuantumWalkOnNetwork:
     def measure(self):
         probability_distribution = np.sum(np.abs(self.position_states)**2, axis=0)
         return probability_distribution
+
     
     def simulate_entanglement_dynamics(self):
         """ Simulate the development of entanglement across the network. """
@@ -140,7 +146,7 @@ class QuantumWalkOnNetwork:
 
     def create_bell_pair(self, nodes):
         """ Initialize a Bell pair between two nodes. """
-        state = np.zeros((2, self.num_nodes), dtype=complex)
+        state = np.zeros((2, self.num_nodes), dtype=self.dtype)
         state[:, nodes[0]] = state[:, nodes[1]] = 1 / np.sqrt(2)
         return state
 
@@ -148,7 +154,7 @@ class QuantumWalkOnNetwork:
         """ Simulate a Bell measurement and return the result as a string of bits. """
         # This is a simplified placeholder for the sake of the example.
         # Real implementation would need quantum gates and measurement in the Bell basis.
-        return np.random.choice(['00', '01', '10', '11'])
+        return self.rng.choice(['00', '01', '10', '11'])
     
     def dynamic_quantum_routing(self):
         """ Dynamically route quantum information in the network to optimize path fidelity. """
@@ -172,13 +178,13 @@ class QuantumWalkOnNetwork:
     def simulate_quantum_transmission(self, path):
         """ Simulate the transmission of a quantum state along a path and return the fidelity. """
         # Placeholder for simulation logic
-        return np.random.random()  # Random fidelity for illustration
+        return self.rng.random()  # Random fidelity for illustration
 
     def entanglement_percolation(self):
         """ Study entanglement percolation in the quantum network. """
         threshold = 0.5
         for edge in self.graph.edges:
-            if np.random.random() < threshold:
+            if self.rng.random() < threshold:
                 self.graph.remove_edge(*edge)  # Remove edges randomly based on a threshold to simulate percolation
         # Analyze the largest connected component as it will have the largest entangled block
         largest_cc = max(nx.connected_components(self.graph), key=len)
@@ -186,10 +192,11 @@ class QuantumWalkOnNetwork:
     
     def calculate_quantum_centrality(self):
         """ Calculate node centrality based on the steady-state distribution of the quantum walk. """
-        steps = 100  # Number of steps to reach approximate steady state
-        for _ in range(steps):
-            self.step()
-        steady_state_probs = np.sum(np.abs(self.position_states)**2, axis=0) / steps
+        # The time-averaged distribution of the continuous-time walk from the current state, read off the
+        # cached spectrum of the graph instead of stepping the walk, so repeated queries only cost matrix products
+        H = graph_hamiltonian(self.adjacency_matrix)
+        steady_state_probs = default_spectral_cache.limiting_distribution(H, self.position_states.T)
+        steady_state_probs /= np.sum(steady_state_probs)
         centrality = {node: prob for node, prob in enumerate(steady_state_probs)}
         return centrality
 
@@ -209,21 +216,22 @@ class QuantumWalkOnNetwork:
             diffusion_history.append(self.measure())
         return diffusion_history
 
-    def visualize_heatmap_evolution(self):
-        """ Visualize the evolution of the quantum walk as a heatmap. """
+    def visualize_heatmap_evolution(self, frames=100, history=None):
+        """ Visualize the evolution of the quantum walk as a heatmap, keeping the snapshots in a HistoryRecorder. """
         fig, ax = plt.subplots()
-        prob_history = []
+        if history is None:
+            history = HistoryRecorder(self.num_nodes, frames + 1)
+        history.record(self.measure())
 
         def update(frame):
             self.step()
-            probs = np.sum(np.abs(self.position_states)**2, axis=0)
-            prob_history.append(probs)
+            history.record(self.measure())
             ax.clear()
-            ax.imshow(np.array(prob_ldisgmentory).T, cmap='hot', aspect='auto')
+            ax.imshow(history.heatmap().T, cmap='hot', aspect='auto')
             ax.set_title(f"Quantum Walk Heatmap at Step {frame + 1}")
 
-        ani = FuncAnimation(fig, update, frames=100, interval=200)
-        plt.colorbar(ax.imshow(np.array(prob_history).T, cmap='hot', aspect='auto'), ax=ax)
+        ani = FuncAnimation(fig, update, frames=frames, interval=200)
+        plt.colorbar(ax.imshow(history.heatmap().T, cmap='hot', aspect='auto'), ax=ax)
         plt.show()
 
         return ani
@@ -231,7 +239,7 @@ class QuantumWalkOnNetwork:
     def dynamic_node_interaction(self):
         """ Adjust interactions dynamically based on the state of the quantum walk. """
         for node in range(self.num_nodes):
-            if np.random.random() < 0.5:  # Randomly decide to adjust connections
+            if self.rng.random() < 0.5:  # Randomly decide to adjust connections
                 neighbors = list(self.graph.neighbors(node))
                 for neighbor in neighbors:
                     # Randomly add or remove edges based on the state amplitude
@@ -244,8 +252,10 @@ class QuantumWalkOnNetwork:
                 self.update_adjacency_matrix()  # Update the adjacency matrix after modifications
 
 
-class IntegratedQuantumWalk:
-    def __init__(self, num_positions, start_position=None, dimension=1, graph_type=None, coin_operation=None, coin_type='Hadamard'):
+class IntegratedQuantumWalk(StepIteratorMixin):
+    def __init__(self, num_positions, start_position=None, dimension=1, graph_type=None, coin_operation=None, coin_type='Hadamard', seed=None, dtype=complex):
+        self.rng = np.random.default_rng(seed)
+        self.dtype = complex_dtype(dtype)
         self.dimension = dimension
         self.coin_type = coin_type
         self.graph_type = graph_type
@@ -253,10 +263,10 @@ class IntegratedQuantumWalk:
         if graph_type:
             self.graph = self.create_graph(num_positions, graph_type)
             self.num_positions = len(self.graph.nodes())
-            self.position_state = np.zeros((2, self.num_positions), dtype=complex)
+            self.position_state = np.zeros((2, self.num_positions), dtype=self.dtype)
         else:
             self.num_positions = num_positions
-            self.position_state = np.zeros((2, self.num_positions), dtype=complex)
+            self.position_state = np.zeros((2, self.num_positions), dtype=self.dtype)
         
         if start_position is None:
             start_position = num_positions // 2 if not graph_type else 0
@@ -266,33 +276,33 @@ class IntegratedQuantumWalk:
 
     def create_graph(self, num_positions, graph_type):
         if graph_type == 'random':
-            return nx.gnp_random_graph(num_positions, p=0.1)
+            return nx.gnp_random_graph(num_positions, p=0.1, seed=graph_seed(self.rng))
         elif graph_type == 'small_world':
-            return nx.watts_strogatz_graph(num_positions, k=4, p=0.1)
+            return nx.watts_strogatz_graph(num_positions, k=4, p=0.1, seed=graph_seed(self.rng))
         elif graph_type == 'scale_free':
-            return nx.barabasi_albert_graph(num_positions, m=2)
+            return nx.barabasi_albert_graph(num_positions, m=2, seed=graph_seed(self.rng))
         else:
             raise ValueError("Unsupported graph type")
 
     def default_coin_operation(self, coin_type):
-        if coin_type == 'Hadamard':
-            H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
-            return lambda pos_state: np.dot(H, pos_state)
-        elif coin_type == 'Grover':
-            G = 2 * np.full((2, 2), 1/2) - np.eye(2)
-            return lambda pos_state: np.dot(G, pos_state)
-        else:
-            raise ValueError("Unsupported default coin type")
+        coin = coin_matrix(coin_type)
+        operation = lambda pos_state: np.dot(coin, pos_state)
+        operation.coin_matrix = coin  # Lets apply_coin skip probing the callable
+        return operation
 
     def apply_coin(self):
         try:
-            for pos in range(self.num_positions):
-                self.position_state[:, pos] = self.coin_operation(self.position_state[:, pos])
+            # The per-position callable is turned into a matrix once and applied to all positions together
+            cached_operation, coin = getattr(self, '_coin_operation_cache', (None, None))
+            if cached_operation is not self.coin_operation:
+                coin = coin_operation_matrix(self.coin_operation)
+                self._coin_operation_cache = (self.coin_operation, coin)
+            self.position_state = apply_coin_field(coin, self.position_state)
         except Exception as e:
             raise RuntimeError(f"Error applying coin operation: {str(e)}")
 
     def apply_decoherence(self, rate=0.01):
-        noise = (np.random.rand(*self.position_state.shape) < rate) * np.random.normal(loc=0.0, scale=1.0, size=self.position_state.shape)
+        noise = (self.rng.random(self.position_state.shape) < rate) * self.rng.normal(loc=0.0, scale=1.0, size=self.position_state.shape)
         self.position_state += noise
         norm = np.sum(np.abs(self.position_state)**2)
         self.position_state /= np.sqrt(norm)
@@ -308,11 +318,11 @@ class IntegratedQuantumWalk:
 
     def update_graph_topology(self, new_graph_type, p=0.1):
         if new_graph_type == 'random':
-            self.graph = nx.gnp_random_graph(self.num_nodes, p)
+            self.graph = nx.gnp_random_graph(self.num_nodes, p, seed=graph_seed(self.rng))
         elif new_graph_type == 'small_world':
-            self.graph = nx.watts_strogatz_graph(self.num_nodes, k=4, p=p)
+            self.graph = nx.watts_strogatz_graph(self.num_nodes, k=4, p=p, seed=graph_seed(self.rng))
         elif new_graph_type == 'scale_free':
-            self.graph = nx.barabasi_albert_graph(self.num_nodes, m=2)
+            self.graph = nx.barabasi_albert_graph(self.num_nodes, m=2, seed=graph_seed(self.rng))
         else:
             raise ValueError("Unsupported graph type")
         self.adjacency_matrix = nx.adjacency_matrix(self.graph).toarray()
@@ -349,7 +359,7 @@ class IntegratedQuantumWalk:
     def shift(self, boundary='periodic'):
         if self.graph_type:
             # Network-based quantum walk shift
-            new_state = np.zeros_like(self.position_state, dtype=complex)
+            new_state = np.zeros_like(self.position_state)
             for node in self.graph.nodes():
                 connected_nodes = list(self.graph.neighbors(node))
                 for connected_node in connected_nodes:
@@ -364,7 +374,7 @@ class IntegratedQuantumWalk:
                 self.position_state = new_state / 2
             elif boundary == 'reflective':
                 # Apply reflective boundary conditions
-                new_state = np.zeros_like(self.position_state, dtype=complex)
+                new_state = np.zeros_like(self.position_state)
                 new_state[:, 1:] += self.position_state[:, :-1]
                 new_state[:, :-1] += self.position_state[:, 1:]
                 new_state[:, 0] += self.position_state[:, 1]
@@ -373,15 +383,15 @@ class IntegratedQuantumWalk:
             else:
                 raise ValueError("Unsupported boundary condition")
 
+    def step(self, boundary='periodic'):
+        self.apply_coin()
+        self.apply_decoherence(rate=0.02)
+        self.shift(boundary=boundary)
 
-        def step(self, boundary='periodic'):
-            self.apply_coin()
-            self.apply_decoherence(rate=0.02)
-            self.shift(boundary=boundary)
+    def measure(self):
+        probability_distribution = np.sum(np.abs(self.position_state)**2, axis=0)
+        return probability_distribution
 
-        def measure(self):
-            probability_distribution = np.sum(np.abs(self.position_state)**2, axis=0)
-            return probability_distribution
 
     def optimize_quantum_walk(self, target_distribution):
         """ Optimize the quantum walk to closely match a target probability distribution. """
@@ -394,7 +404,7 @@ class IntegratedQuantumWalk:
             current_distribution = self.measure()
             return np.linalg.norm(current_norm(bution - target_distribution))  # L2 norm as an example loss function
 
-        initial_params = np.random.random(4)  # Assume some model for coin that can be parameterized
+        initial_params = self.rng.random(4)  # Assume some model for coin that can be parameterized
         result = minimize(loss, initial_params, method='BFGS')
         optimized_params = result.x
         return optimized_params
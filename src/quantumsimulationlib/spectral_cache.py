@@ -0,0 +1,124 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+class SpectralCache:
+    """
+    Least-recently-used cache of Hamiltonian eigendecompositions keyed by matrix content.
+
+    Once a graph has been diagonalized, exact propagators, evolved states at any time,
+    time-averaged (limiting) distributions and return probabilities are matrix products
+    with the stored eigenvectors. Entries are evicted oldest first when the stored
+    eigenvalues and eigenvectors exceed `max_bytes`.
+    """
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes + vectors.nbytes for values, vectors in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    @staticmethod
+    def content_key(hamiltonian):
+        """ Return a digest of the matrix shape, dtype and entries, identical for equal dense or sparse matrices. """
+        from scipy import sparse
+        matrix = sparse.csr_matrix(hamiltonian)
+        matrix.sum_duplicates()
+        matrix.sort_indices()
+        matrix.eliminate_zeros()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((matrix.shape, matrix.dtype.str)).encode())
+        for array in (matrix.indptr, matrix.indices, matrix.data):
+            digest.update(np.ascontiguousarray(array))
+        return digest.hexdigest()
+
+    def decomposition(self, hamiltonian, num_eigenpairs=None, which='SA'):
+        """
+        Return (eigenvalues, eigenvectors) of a Hermitian matrix, computing them on a cache miss.
+
+        Args:
+            hamiltonian: A Hermitian (N, N) matrix, dense or scipy.sparse.
+            num_eigenpairs (int): Keep only this many eigenpairs (computed with eigsh); None for all of them.
+            which (str): The eigsh selection used with num_eigenpairs, e.g. 'SA' for the lowest energies.
+
+        Returns:
+            tuple: Eigenvalues in ascending order and the matching (N, K) eigenvector matrix.
+        """
+        key = (self.content_key(hamiltonian), num_eigenpairs, which if num_eigenpairs else None)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        if num_eigenpairs is None:
+            dense = hamiltonian.toarray() if hasattr(hamiltonian, 'toarray') else np.asarray(hamiltonian)
+            eigenvalues, eigenvectors = np.linalg.eigh(dense)
+        else:
+            from scipy.sparse.linalg import eigsh
+            eigenvalues, eigenvectors = eigsh(hamiltonian, k=num_eigenpairs, which=which)
+            order = np.argsort(eigenvalues)
+            eigenvalues, eigenvectors = eigenvalues[order], eigenvectors[:, order]
+        entry = (eigenvalues, eigenvectors)
+        if eigenvalues.nbytes + eigenvectors.nbytes <= self.max_bytes:
+            self._entries[key] = entry
+            while self.nbytes > self.max_bytes:
+                self._entries.popitem(last=False)
+        return entry
+
+    def propagator(self, hamiltonian, t, num_eigenpairs=None):
+        """ Return the (N, N) matrix exp(-i H t), restricted to the cached eigenspace when num_eigenpairs is set. """
+        eigenvalues, eigenvectors = self.decomposition(hamiltonian, num_eigenpairs)
+        return (eigenvectors * np.exp(-1j * eigenvalues * t)) @ eigenvectors.conj().T
+
+    def evolve(self, hamiltonian, state, times, num_eigenpairs=None):
+        """
+        Apply exp(-i H t) to a state with the node axis first for one or more times.
+
+        Returns:
+            np.ndarray: The evolved state, with a leading time axis if `times` is a sequence.
+        """
+        eigenvalues, eigenvectors = self.decomposition(hamiltonian, num_eigenpairs)
+        state = np.asarray(state, dtype=complex)
+        coefficients = (eigenvectors.conj().T @ state).reshape(len(eigenvalues), -1)
+        phases = np.exp(-1j * np.outer(np.atleast_1d(times), eigenvalues))
+        evolved = np.matmul(eigenvectors, phases[:, :, np.newaxis] * coefficients)
+        evolved = evolved.reshape((-1,) + state.shape)
+        return evolved if np.ndim(times) else evolved[0]
+
+    def limiting_distribution(self, hamiltonian, state, num_eigenpairs=None, tol=1e-9):
+        """
+        Return the long-time average of the node probabilities, summed over any trailing state axes.
+
+        Only the projections onto each distinct energy survive the time average,
+        so the result is sum_E |P_E psi|^2 with eigenvalues closer than `tol` treated as degenerate.
+        """
+        eigenvalues, eigenvectors = self.decomposition(hamiltonian, num_eigenpairs)
+        state = np.asarray(state, dtype=complex)
+        coefficients = (eigenvectors.conj().T @ state).reshape(len(eigenvalues), -1)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(eigenvalues) > tol) + 1))
+        weighted = eigenvectors[:, :, np.newaxis] * coefficients[np.newaxis, :, :]
+        projections = np.add.reduceat(weighted, starts, axis=1)
+        return np.sum(np.abs(projections)**2, axis=(1, 2))
+
+    def return_probability(self, hamiltonian, start, times, num_eigenpairs=None):
+        """ Return |<psi| exp(-i H t) |psi>|^2 for a start node index or state vector at one or more times. """
+        eigenvalues, eigenvectors = self.decomposition(hamiltonian, num_eigenpairs)
+        if np.ndim(start) == 0:
+            weights = np.abs(eigenvectors[start])**2
+        else:
+            weights = np.abs(eigenvectors.conj().T @ np.asarray(start, dtype=complex))**2
+        amplitudes = np.exp(-1j * np.outer(np.atleast_1d(times), eigenvalues)) @ weights
+        probabilities = np.abs(amplitudes)**2
+        return probabilities if np.ndim(times) else probabilities[0]
+
+default_spectral_cache = SpectralCache()
@@ -0,0 +1,97 @@
+import numpy as np
+
+def walker_state(walker):
+    """ Return a walker's state array, whichever of the position_states / position_state names it uses. """
+    return walker.position_states if hasattr(walker, 'position_states') else walker.position_state
+
+def position_moments(probabilities, batch_axes=0):
+    """
+    Return the mean and variance of the position along every lattice axis of a probability array.
+
+    Args:
+        probabilities (np.ndarray): Probabilities with `batch_axes` leading axes (e.g. one per walker)
+            followed by the position axes.
+        batch_axes (int): The number of leading axes that are not positions.
+
+    Returns:
+        tuple: (mean, variance), each shaped like the batch axes, with a trailing axis of length d
+        for walks on d > 1 position axes.
+    """
+    position_axes = tuple(range(batch_axes, probabilities.ndim))
+    total = np.sum(probabilities, axis=position_axes)
+    means, variances = [], []
+    for axis in position_axes:
+        marginal = np.sum(probabilities, axis=tuple(a for a in position_axes if a != axis))
+        coordinates = np.arange(probabilities.shape[axis])
+        mean = marginal @ coordinates / total
+        means.append(mean)
+        variances.append(marginal @ coordinates**2 / total - mean**2)
+    if len(position_axes) == 1:
+        return means[0], variances[0]
+    return np.stack(means, axis=-1), np.stack(variances, axis=-1)
+
+def position_entropy(probabilities, batch_axes=0):
+    """ Return the Shannon entropy (in nats) of the position distribution, per batch entry. """
+    position_axes = tuple(range(batch_axes, probabilities.ndim))
+    terms = np.where(probabilities > 0, probabilities * np.log(np.where(probabilities > 0, probabilities, 1)), 0)
+    return -np.sum(terms, axis=position_axes)
+
+def iter_steps(walker, num_steps, stride=1, observables=('probability',), batch_axes=0, **step_options):
+    """
+    Step a walker and yield only the requested observables, every `stride` steps.
+
+    Nothing but the current state is kept in memory, so long runs cost the size of the yielded
+    reductions rather than steps x full state. The full state is copied out only when 'state'
+    is requested.
+
+    Args:
+        walker: Any walker with step() and measure().
+        num_steps (int): The number of steps to take.
+        stride (int): Yield after every `stride` steps; the final step is always yielded.
+        observables (sequence): Names among 'probability', 'mean', 'variance', 'entropy' and 'state',
+            or callables taking the walker, reported under their __name__.
+        batch_axes (int): Leading axes of measure() that are not positions, e.g. 1 for a walker batch.
+        **step_options: Keyword arguments passed to every walker.step() call.
+
+    Yields:
+        dict: The step count under 'step' and one entry per observable.
+    """
+    if stride < 1:
+        raise ValueError("stride must be a positive integer.")
+    if isinstance(observables, str) or callable(observables):
+        observables = (observables,)
+    for name in observables:
+        if not callable(name) and name not in ('probability', 'mean', 'variance', 'entropy', 'state'):
+            raise ValueError("Unsupported observable: {}".format(name))
+    for step in range(1, num_steps + 1):
+        walker.step(**step_options)
+        if step % stride and step != num_steps:
+            continue
+        record = {'step': step}
+        probabilities, moments = None, None
+        for name in observables:
+            if callable(name):
+                record[name.__name__] = name(walker)
+            elif name == 'state':
+                record[name] = np.array(walker_state(walker))
+            else:
+                if probabilities is None:
+                    probabilities = walker.measure()
+                if name == 'probability':
+                    record[name] = probabilities
+                elif name == 'entropy':
+                    record[name] = position_entropy(probabilities, batch_axes)
+                else:
+                    if moments is None:
+                        moments = position_moments(probabilities, batch_axes)
+                    record[name] = moments[0] if name == 'mean' else moments[1]
+        yield record
+
+class StepIteratorMixin:
+    """ Give a walker class with step() and measure() an iter_steps method. """
+    # Leading axes of measure() that are not positions, e.g. 1 for a batch of walkers
+    batch_axes = 0
+
+    def iter_steps(self, num_steps, stride=1, observables=('probability',), **step_options):
+        """ Step the walk and yield the requested observables every `stride` steps without keeping past states (see stepping.iter_steps). """
+        return iter_steps(self, num_steps, stride, observables, self.batch_axes, **step_options)
@@ -0,0 +1,118 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .quantum_walk_batch import QuantumWalkBatch
+from .utils import as_seed_sequence, child_seeds
+
+def merge_statistics(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """ Combine the (count, mean, sum of squared deviations) of two samples with Chan's parallel update. """
+    count = count_a + count_b
+    if count_a == 0:
+        return count_b, mean_b, m2_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + delta**2 * (count_a * count_b / count)
+    return count, mean, m2
+
+def _sample_statistics(probabilities):
+    probabilities = probabilities.astype(np.float64, copy=False)
+    mean = np.mean(probabilities, axis=0)
+    return len(probabilities), mean, np.sum((probabilities - mean)**2, axis=0)
+
+def _run_chunk(initial_state, coin, boundary, noise_model, noise_rate, steps, seeds, record_history):
+    """ Evolve one chunk of trajectories, one per seed, as a QuantumWalkBatch and return its summary statistics. """
+    batch = QuantumWalkBatch(initial_state.shape[1], np.zeros(len(seeds), dtype=int), coin, boundary, noise_rate,
+                             seed=list(seeds), dtype=initial_state.dtype)
+    batch.position_states = np.broadcast_to(initial_state, batch.position_states.shape).copy()
+    batch.noise_model = noise_model
+    history = []
+    for _ in range(steps):
+        batch.step()
+        if record_history:
+            history.append(_sample_statistics(batch.measure()))
+    return _sample_statistics(batch.measure()), history
+
+class TrajectoryEnsemble:
+    """
+    Average many stochastic realizations (quantum trajectories) of a noisy line walk.
+
+    Each trajectory is a pure state that receives its own random noise realization every step, so the
+    mean position distribution over trajectories equals the diagonal of the ensemble density matrix
+    without ever storing an N x N matrix. Trajectories run in vectorized chunks of `chunk_size`, either
+    in this process or across a process pool, and their means and variances are merged in streaming form.
+    Every trajectory draws from its own SeedSequence child, so results for a given seed do not depend
+    on the chunk size or the number of workers, and any single trajectory can be replayed. Runs of one
+    ensemble reuse the same seeds; pass a different seed for fresh samples.
+    """
+    def __init__(self, initial_state, coin='Hadamard', boundary='periodic', noise_model='gaussian', noise_rate=0.02, chunk_size=1024, seed=None):
+        self.initial_state = np.asarray(initial_state)
+        # Keep a single-precision start state in single precision; anything else runs in complex128
+        self.initial_state = self.initial_state.astype(np.result_type(self.initial_state.dtype, np.complex64), copy=False)
+        if self.initial_state.ndim != 2 or self.initial_state.shape[0] != 2:
+            raise ValueError("The initial state must be shaped (2, num_positions).")
+        self.coin = coin
+        self.boundary = boundary
+        self.noise_model = noise_model
+        self.noise_rate = noise_rate
+        self.chunk_size = chunk_size
+        self.seed_sequence = as_seed_sequence(seed)
+
+    @classmethod
+    def from_walk(cls, walk, boundary='periodic', noise_model='gaussian', chunk_size=1024, seed=None):
+        """ Build an ensemble starting from a QuantumWalk's current state, uniform coin and decoherence rate. """
+        coin = walk.current_coin()
+        if coin.shape != (2, 2):
+            raise ValueError("Only walks with a uniform 2x2 coin can be run as trajectories.")
+        return cls(walk.position_state, coin, boundary, noise_model, walk.decoherence_rate, chunk_size, seed)
+
+    def run(self, num_trajectories, steps, workers=None, record_history=False):
+        """
+        Run `num_trajectories` trajectories for `steps` steps and return their position statistics.
+
+        Args:
+            num_trajectories (int): The ensemble size.
+            steps (int): The number of coin, noise and shift steps per trajectory.
+            workers (int): Processes to spread the chunks over; None or 1 runs them in this process.
+            record_history (bool): Also return the mean and variance after every step.
+
+        Returns:
+            dict: 'mean' and 'variance' (sample variance) of the final position probabilities,
+            'num_trajectories', and with record_history the (steps, N) 'mean_history' and 'variance_history'.
+        """
+        seeds = self.trajectory_seeds(num_trajectories)
+        arguments = [(self.initial_state, self.coin, self.boundary, self.noise_model, self.noise_rate, steps,
+                      seeds[start:start + self.chunk_size], record_history)
+                     for start in range(0, num_trajectories, self.chunk_size)]
+        if workers is None or workers == 1:
+            results = (_run_chunk(*chunk_arguments) for chunk_arguments in arguments)
+            return self._merge(results, steps, record_history)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_run_chunk, *zip(*arguments))
+            return self._merge(results, steps, record_history)
+
+    def trajectory_seeds(self, num_trajectories):
+        """ Return the SeedSequence of each trajectory; every run of this ensemble reuses the same seeds. """
+        return child_seeds(self.seed_sequence, num_trajectories)
+
+    def replay(self, index, steps):
+        """ Rerun trajectory `index` of a run alone and return its final (2, num_positions) state. """
+        batch = QuantumWalkBatch(self.initial_state.shape[1], [0], self.coin, self.boundary, self.noise_rate,
+                                 seed=self.trajectory_seeds(index + 1)[index:], dtype=self.initial_state.dtype)
+        batch.position_states[0] = self.initial_state
+        batch.noise_model = self.noise_model
+        for _ in range(steps):
+            batch.step()
+        return batch.position_states[0]
+
+    def _merge(self, results, steps, record_history):
+        num_positions = self.initial_state.shape[1]
+        final = (0, np.zeros(num_positions), np.zeros(num_positions))
+        history = [(0, np.zeros(num_positions), np.zeros(num_positions)) for _ in range(steps if record_history else 0)]
+        for chunk_final, chunk_history in results:
+            final = merge_statistics(*final, *chunk_final)
+            history = [merge_statistics(*total, *chunk) for total, chunk in zip(history, chunk_history)]
+        count, mean, m2 = final
+        statistics = {'mean': mean, 'variance': m2 / max(count - 1, 1), 'num_trajectories': count}
+        if record_history:
+            statistics['mean_history'] = np.array([mean for _, mean, _ in history])
+            statistics['variance_history'] = np.array([m2 / max(count - 1, 1) for _, _, m2 in history])
+        return statistics
@@ -0,0 +1,108 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+# Recently built walk operators keyed by the content of their coin, shift and boundary
+_operator_cache = OrderedDict()
+MAX_CACHED_OPERATORS = 8
+
+def shift_destinations(displacements, grid_shape, boundary='periodic'):
+    """
+    Return where the shift sends every (component, site) of a (k, *grid) state.
+
+    Returns:
+        tuple: (components, sites, kept) arrays shaped (k, M) with the destination coin component,
+        the flat destination site, and False where absorbing boundaries remove the amplitude.
+    """
+    if boundary not in ('periodic', 'reflective', 'absorbing'):
+        raise ValueError("Unsupported boundary condition: {}".format(boundary))
+    coordinates = np.indices(grid_shape).reshape(len(grid_shape), -1)
+    num_sites = coordinates.shape[1]
+    components = np.empty((len(displacements), num_sites), dtype=np.intp)
+    sites = np.empty((len(displacements), num_sites), dtype=np.intp)
+    kept = np.ones((len(displacements), num_sites), dtype=bool)
+    for component, displacement in enumerate(displacements):
+        moved = coordinates + np.asarray(displacement)[:, np.newaxis]
+        inside = np.all((moved >= 0) & (moved < np.array(grid_shape)[:, np.newaxis]), axis=0)
+        components[component] = component
+        if boundary == 'periodic':
+            moved %= np.array(grid_shape)[:, np.newaxis]
+        elif boundary == 'reflective':
+            opposite = np.flatnonzero(np.all(displacements == -np.asarray(displacement), axis=1))
+            if opposite.size == 0:
+                raise ValueError("Reflective boundaries need a coin component with the opposite displacement.")
+            # Amplitude that would leave stays on its site in the opposite component
+            components[component, ~inside] = opposite[0]
+            moved[:, ~inside] = coordinates[:, ~inside]
+        else:
+            kept[component] = inside
+            moved[:, ~inside] = 0
+        sites[component] = np.ravel_multi_index(tuple(moved), grid_shape)
+    return components, sites, kept
+
+def walk_operator(coin, displacements, grid_shape, boundary='periodic', phases=None, dtype=complex):
+    """
+    Build the one-step operator U = S C P of a coined walk as a sparse matrix on the full coin-position space.
+
+    Rows and columns follow the flattened (k, *grid) state, so U @ state.ravel() is one step.
+    Each column has at most k entries, so the matrix has k**2 M non-zeros, built directly from the
+    coin and the shift. The result is cached per coin, phases, displacements, boundary and shape,
+    and the cached matrix itself is returned, so its data, indices and indptr arrays are read-only;
+    call .copy() on it before modifying it in place.
+
+    Args:
+        coin (np.ndarray): A uniform (k, k) coin or a (*grid, k, k) coin field.
+        displacements (np.ndarray): The (k, d) lattice displacement of each coin component.
+        grid_shape (tuple): The lattice shape.
+        boundary (str): 'periodic', 'reflective' or 'absorbing'.
+        phases (np.ndarray): Optional (*grid,) on-site phase factors applied before the coin.
+        dtype: The matrix dtype.
+
+    Returns:
+        scipy.sparse.csr_matrix: The (k M, k M) walk operator, shared with the cache and read-only.
+    """
+    from scipy import sparse
+    grid_shape = tuple(grid_shape)
+    coin = np.asarray(coin)
+    displacements = np.asarray(displacements)
+    key = _operator_key(coin, displacements, grid_shape, boundary, phases, dtype)
+    operator = _operator_cache.get(key)
+    if operator is not None:
+        _operator_cache.move_to_end(key)
+        return operator
+
+    coin_dimension = len(displacements)
+    num_sites = int(np.prod(grid_shape))
+    # Per-site coin entries shaped (k, k, M): entry [out, in, site]
+    if coin.ndim == 2:
+        coin_entries = np.broadcast_to(coin[:, :, np.newaxis], (coin_dimension, coin_dimension, num_sites))
+    else:
+        coin_entries = np.moveaxis(coin.reshape(num_sites, coin_dimension, coin_dimension), 0, -1)
+    if phases is not None:
+        coin_entries = coin_entries * np.asarray(phases).reshape(num_sites)
+    components, sites, kept = shift_destinations(displacements, grid_shape, boundary)
+
+    columns = np.arange(coin_dimension * num_sites).reshape(coin_dimension, num_sites)
+    rows = components * num_sites + sites
+    # Input component j at site x is coined into component i, which the shift then sends to rows[i, x]
+    row_indices = np.broadcast_to(rows[:, np.newaxis, :], coin_entries.shape)
+    column_indices = np.broadcast_to(columns[np.newaxis, :, :], coin_entries.shape)
+    keep = np.broadcast_to(kept[:, np.newaxis, :], coin_entries.shape)
+    size = coin_dimension * num_sites
+    operator = sparse.csr_matrix((np.asarray(coin_entries[keep], dtype=dtype), (row_indices[keep], column_indices[keep])), shape=(size, size))
+    operator.eliminate_zeros()
+    # Callers share the cached matrix, so in-place edits must not reach later callers
+    for array in (operator.data, operator.indices, operator.indptr):
+        array.flags.writeable = False
+
+    _operator_cache[key] = operator
+    while len(_operator_cache) > MAX_CACHED_OPERATORS:
+        _operator_cache.popitem(last=False)
+    return operator
+
+def _operator_key(coin, displacements, grid_shape, boundary, phases, dtype):
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (coin, displacements) + (() if phases is None else (np.asarray(phases),)):
+        digest.update(repr((array.shape, array.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(array))
+    return digest.hexdigest(), phases is None, grid_shape, boundary, np.dtype(dtype).str
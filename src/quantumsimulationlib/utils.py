@@ -0,0 +1,181 @@
+import itertools
+import numpy as np
+
+def complex_dtype(dtype):
+    """ Return a walker state dtype, which must be complex64 (single precision) or complex128. """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.complex64, np.complex128):
+        raise ValueError("Walker states must be complex64 or complex128.")
+    return dtype
+
+def normalize_state(state):
+    """ Rescale a state to unit norm in place, accumulating the norm in double precision. """
+    state /= np.sqrt(np.sum(np.abs(state)**2, dtype=np.float64)).astype(state.real.dtype)
+    return state
+
+def support_bounds(probabilities, epsilon):
+    """ Return the per-axis (start, stop) bounding box of sites with probability above epsilon, or None if there are none. """
+    bounds = []
+    for axis in range(probabilities.ndim):
+        other_axes = tuple(a for a in range(probabilities.ndim) if a != axis)
+        occupied = np.flatnonzero(np.max(probabilities, axis=other_axes) > epsilon)
+        if occupied.size == 0:
+            return None
+        bounds.append((int(occupied[0]), int(occupied[-1]) + 1))
+    return bounds
+
+def shift_slices(displacement):
+    """ Return (target, source) slice tuples that move an array by a displacement of -1, 0 or +1 per axis. """
+    target, source = [], []
+    for step in displacement:
+        if step > 0:
+            target.append(slice(1, None))
+            source.append(slice(None, -1))
+        elif step < 0:
+            target.append(slice(None, -1))
+            source.append(slice(1, None))
+        else:
+            target.append(slice(None))
+            source.append(slice(None))
+    return tuple(target), tuple(source)
+
+def evaluate_on_grid(function, grid_shape, value_shape=()):
+    """
+    Evaluate a function of the lattice site on every site of a grid, returning a (*grid_shape, *value_shape) array.
+
+    The function is first called once with the coordinate arrays from np.indices (a single array
+    in 1D, a tuple of arrays otherwise). If that fails or does not return the whole grid, it is
+    called once per site with an int (1D) or an index tuple.
+    """
+    grid_shape, value_shape = tuple(grid_shape), tuple(value_shape)
+    coordinates = np.indices(grid_shape)
+    arguments = coordinates[0] if len(grid_shape) == 1 else tuple(coordinates)
+    try:
+        values = np.asarray(function(arguments))
+        if values.shape == grid_shape + value_shape:
+            return values
+    except (TypeError, ValueError, IndexError):
+        pass
+    # Scalar function: evaluate it once per site
+    sites = range(grid_shape[0]) if len(grid_shape) == 1 else np.ndindex(*grid_shape)
+    values = np.array([np.asarray(function(site)) for site in sites])
+    if values.shape[1:] != value_shape:
+        raise ValueError("Values must be shaped {} at every site.".format(value_shape))
+    return values.reshape(grid_shape + value_shape)
+
+def as_seed_sequence(seed):
+    """ Return the SeedSequence behind None, an int, a SeedSequence or a Generator. """
+    if isinstance(seed, np.random.Generator):
+        return seed.bit_generator.seed_seq
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+def spawn_seeds(seed, count):
+    """
+    Return `count` independent SeedSequence children for batch, thread or process ensembles.
+
+    `seed` may be None, an int, a SeedSequence or a Generator; children of the same seed are
+    reproducible, so any one member of an ensemble can be rerun bit for bit from its child.
+    """
+    return as_seed_sequence(seed).spawn(count)
+
+def child_seeds(seed_sequence, count):
+    """ Return the first `count` children of a SeedSequence without advancing its spawn counter. """
+    return [np.random.SeedSequence(seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (index,), pool_size=seed_sequence.pool_size)
+            for index in range(count)]
+
+def spawn_generators(seed, count):
+    """ Return `count` independent Generators spawned from a seed, SeedSequence or Generator. """
+    return [np.random.default_rng(child) for child in spawn_seeds(seed, count)]
+
+def graph_seed(rng):
+    """ Draw an integer seed for a networkx random graph generator from a Generator. """
+    return int(rng.integers(2**32))
+
+def lattice_displacements(dimensions):
+    """ Return the (2d, d) displacement table of a lattice walk: component 2i moves +1 along axis i, 2i + 1 moves -1. """
+    unit_vectors = np.eye(dimensions, dtype=int)
+    return np.stack([unit_vectors, -unit_vectors], axis=1).reshape(2 * dimensions, dimensions)
+
+def _axis_pieces(step, size):
+    """ Return the (target, source) slice pairs that move one axis by `step` sites with periodic wrap. """
+    if step == 0:
+        return [(slice(None), slice(None))]
+    if step > 0:
+        return [(slice(step, None), slice(None, size - step)), (slice(None, step), slice(size - step, None))]
+    return [(slice(None, size + step), slice(-step, None)), (slice(size + step, None), slice(None, -step))]
+
+def shift_components(state, out, displacements, boundary='periodic'):
+    """
+    Move every coin component of a (k, *grid) state by its lattice displacement, writing into `out`.
+
+    Each component is copied in at most 2**d contiguous pieces straight into the preallocated output,
+    with no temporaries. Boundaries are 'periodic' (wrap around), 'absorbing' (amplitude leaving the
+    grid is lost) or 'reflective' (amplitude that would leave stays on its site and turns into the
+    component with the opposite displacement).
+
+    Args:
+        state (np.ndarray): The (k, *grid) state.
+        out (np.ndarray): A different array of the same shape that receives the shifted state.
+        displacements (np.ndarray): The (k, d) integer displacement of each coin component.
+        boundary (str): 'periodic', 'reflective' or 'absorbing'.
+
+    Returns:
+        np.ndarray: `out`.
+    """
+    if boundary not in ('periodic', 'reflective', 'absorbing'):
+        raise ValueError("Unsupported boundary condition: {}".format(boundary))
+    grid_shape = state.shape[1:]
+    for component, displacement in enumerate(displacements):
+        steps = [int(step) for step in displacement]
+        pieces = [_axis_pieces(step, size) for step, size in zip(steps, grid_shape)]
+        if boundary == 'periodic':
+            for combination in itertools.product(*pieces):
+                target = tuple(piece[0] for piece in combination)
+                source = tuple(piece[1] for piece in combination)
+                out[component][target] = state[component][source]
+            continue
+        out[component][tuple(piece[0][0] for piece in pieces)] = state[component][tuple(piece[0][1] for piece in pieces)]
+        if boundary == 'reflective':
+            opposite = np.flatnonzero(np.all(displacements == -np.asarray(displacement), axis=1))
+            if opposite.size == 0:
+                raise ValueError("Reflective boundaries need a coin component with the opposite displacement.")
+        # Sites the component cannot be shifted into: the strip each moving axis uncovers
+        for axis, axis_pieces in enumerate(pieces):
+            if len(axis_pieces) == 1:
+                continue
+            strip = (slice(None),) * axis + (axis_pieces[1][0],)
+            if boundary == 'absorbing':
+                out[component][strip] = 0
+            else:
+                # These are exactly the sites where the opposite component would leave the grid
+                out[component][strip] = state[opposite[0]][strip]
+    return out
+
+def neighbor_sum(array, boundary='periodic', axes=None):
+    """
+    Return the sum of the two nearest neighbours along each of `axes` (default all) at every site.
+
+    The stencil is built from shifted slice views, so it costs a few array additions. Missing
+    neighbours at the edges wrap around ('periodic'), repeat the edge site ('reflective') or count
+    as zero ('absorbing').
+    """
+    if boundary not in ('periodic', 'reflective', 'absorbing'):
+        raise ValueError("Unsupported boundary condition: {}".format(boundary))
+    axes = range(array.ndim) if axes is None else axes
+    total = np.zeros_like(array)
+
+    def along(axis, index):
+        return (slice(None),) * axis + (index,)
+
+    for axis in axes:
+        total[along(axis, slice(1, None))] += array[along(axis, slice(None, -1))]
+        total[along(axis, slice(None, -1))] += array[along(axis, slice(1, None))]
+        if boundary == 'periodic':
+            total[along(axis, 0)] += array[along(axis, -1)]
+            total[along(axis, -1)] += array[along(axis, 0)]
+        elif boundary == 'reflective':
+            total[along(axis, 0)] += array[along(axis, 0)]
+            total[along(axis, -1)] += array[along(axis, -1)]
+    return total
@@ -3,6 +3,7 @@ import numpy as np
 import networkx as nx
 from matplotlib.animation import FuncAnimation
 from mpl_toolkits.mplot3d import Axes3D
+from .history import DEFAULT_HISTORY_CAPACITY, record_history
 
 def plot_quantum_state(state):
     plt.figure(figsize=(10, 6))
@@ -60,8 +61,13 @@ def plot_3d_walk(qw):
         ax.set_title('3D Quantum Walk Probability Distribution')
         plt.show()
 
-def visualize_path_history(qw):
-    data = np.array([np.abs(state).sum(axis=0) for state in qw.path_history])
+def visualize_path_history(qw, num_steps=None, stride=1, history=None, capacity=DEFAULT_HISTORY_CAPACITY, dtype=np.float32, path=None, spill_path=None):
+    if num_steps is not None:
+        # Record probability snapshots from the walk into a ring buffer rather than storing its states
+        history = record_history(qw, num_steps, stride, history, capacity, dtype, path, spill_path)
+    elif history is None:
+        history = getattr(qw, 'path_history', None) or record_history(qw, 0)
+    data = history.heatmap()
     plt.imshow(data.T, interpolation='nearest', cmap='hot', aspect='auto')
     plt.colorbar()
     plt.xlabel('Time Step')
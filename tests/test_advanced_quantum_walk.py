@@ -0,0 +1,12 @@
+import numpy as np
+from quantumsimulationlib import AdvancedQuantumWalk
+
+def test_active_window_uses_the_decoherence_rate():
+    full = AdvancedQuantumWalk(40, [5], seed=2)
+    windowed = AdvancedQuantumWalk(40, [5], seed=2)
+    full.decoherence_rate = windowed.decoherence_rate = 0
+    windowed.enable_active_window(epsilon=0)
+    for _ in range(20):
+        full.step()
+        windowed.step()
+    np.testing.assert_allclose(windowed.position_states, full.position_states, atol=1e-12)
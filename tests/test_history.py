@@ -0,0 +1,43 @@
+import numpy as np
+from quantumsimulationlib import HistoryRecorder, QuantumWalk
+
+def _snapshot(step):
+    return np.full(3, step, dtype=np.float32)
+
+def test_ring_keeps_the_last_snapshots_in_order():
+    history = HistoryRecorder(3, 4)
+    for step in range(10):
+        history.record(_snapshot(step))
+    assert len(history) == 4
+    np.testing.assert_array_equal(history.recorded_steps(), [6, 7, 8, 9])
+    np.testing.assert_array_equal(history.snapshots()[:, 0], [6, 7, 8, 9])
+
+def test_spilled_snapshots_are_kept_on_disk(tmp_path):
+    history = HistoryRecorder(3, 4, spill_path=str(tmp_path / 'spill.dat'))
+    for step in range(23):
+        history.record(_snapshot(step))
+    assert history.buffer.shape == (4, 3)
+    assert len(history) == 23
+    np.testing.assert_array_equal(history.recorded_steps(), np.arange(23))
+    np.testing.assert_array_equal(history.snapshots()[:, 0], np.arange(23))
+    np.testing.assert_array_equal(history.snapshots(time_stride=5)[:, 0], np.arange(0, 23, 5))
+    history.clear()
+    history.record(_snapshot(1))
+    assert len(history) == 1
+
+def test_walks_start_without_a_path_history():
+    walk = QuantumWalk(1000, 500)
+    assert walk.path_history is None
+    walk.set_start_position(10)
+    assert walk.path_history is None
+
+def test_record_history_defaults_to_a_bounded_ring(tmp_path):
+    from quantumsimulationlib.history import record_history
+    history = record_history(QuantumWalk(64, 32), 40, capacity=8)
+    assert history.buffer.shape == (8, 64)
+    np.testing.assert_array_equal(history.recorded_steps(), np.arange(33, 41))
+    assert record_history(QuantumWalk(64, 32), 5000).capacity == 1024
+    assert record_history(QuantumWalk(64, 32), 10).capacity == 12
+    full = record_history(QuantumWalk(64, 32), 40, capacity=8, dtype=np.float16, spill_path=str(tmp_path / 'spill.dat'))
+    assert full.buffer.dtype == np.float16
+    np.testing.assert_array_equal(full.recorded_steps(), np.arange(41))
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from quantumsimulationlib import MultiDimensionalQuantumWalk
+
+@pytest.mark.parametrize('coin_space', ['diagonal', 'lattice'])
+@pytest.mark.parametrize('boundary', ['periodic', 'reflective', 'absorbing'])
+def test_transition_matrix_matches_step(coin_space, boundary):
+    walk = MultiDimensionalQuantumWalk(2, 6, (2, 3), coin_space=coin_space)
+    walk.boundary_condition = boundary
+    walk.step()
+    operator = walk.calculate_transition_matrix()
+    expected = (operator @ walk.position_states.ravel()).reshape(walk.position_states.shape)
+    walk.step()
+    np.testing.assert_allclose(walk.position_states, expected, atol=1e-12)
+
+def test_cached_transition_matrix_cannot_be_modified():
+    walk = MultiDimensionalQuantumWalk(2, 5, (2, 2))
+    operator = walk.calculate_transition_matrix()
+    with pytest.raises(ValueError):
+        operator.data *= 2
+    edited = operator.copy()
+    edited.data *= 2
+    np.testing.assert_allclose(walk.calculate_transition_matrix().toarray(), operator.toarray())
+    assert walk.calculate_transition_matrix() is operator
+
+def test_active_window_follows_evolve_to():
+    full = MultiDimensionalQuantumWalk(2, 40, (20, 20))
+    windowed = MultiDimensionalQuantumWalk(2, 40, (20, 20))
+    windowed.enable_active_window(epsilon=0)
+    for walk in (full, windowed):
+        walk.step()
+        walk.evolve_to(12)
+        walk.step()
+    np.testing.assert_allclose(windowed.position_states, full.position_states, atol=1e-12)
+
+def test_complex64_state_is_kept():
+    walk = MultiDimensionalQuantumWalk(2, 8, (4, 4), dtype=np.complex64)
+    for _ in range(3):
+        walk.step()
+    assert walk.position_states.dtype == np.complex64
+
+def test_out_of_core_measurements_are_not_overwritten(tmp_path):
+    walk = MultiDimensionalQuantumWalk(2, 8, (4, 4), memmap_dir=str(tmp_path))
+    in_memory = MultiDimensionalQuantumWalk(2, 8, (4, 4))
+    for _ in range(3):
+        walk.step()
+        in_memory.step()
+    first = walk.measure()
+    expected = first.copy()
+    walk.step()
+    second = walk.measure()
+    np.testing.assert_array_equal(first, expected)
+    assert not np.array_equal(first, second)
+    np.testing.assert_allclose(first, in_memory.measure(), atol=1e-12)
+    reused = walk.measure(out=second)
+    assert reused is second
+
+def test_out_of_core_measurements_leave_no_files_behind(tmp_path):
+    state_dir = tmp_path / 'state'
+    walk = MultiDimensionalQuantumWalk(2, 8, (4, 4), memmap_dir=str(state_dir))
+    walk.step()
+    files = sorted(state_dir.iterdir())
+    list(walk.iter_steps(5, observables=('probability', 'entropy')))
+    walk.measure(keep_axes=(0,))
+    assert sorted(state_dir.iterdir()) == files
+    saved = walk.measure(path=str(tmp_path / 'probabilities.dat'))
+    assert isinstance(saved, np.memmap)
+    np.testing.assert_allclose(saved, walk.measure())
+
+def _configure(walk):
+    rng = np.random.default_rng(4)
+    coins = np.linalg.qr(rng.standard_normal((7, 7, walk.coin_dimension, walk.coin_dimension))
+                         + 1j * rng.standard_normal((7, 7, walk.coin_dimension, walk.coin_dimension)))[0]
+    walk.set_coin_field(coins)
+    walk.set_potential(rng.standard_normal((7, 7)), 0.3)
+    return walk
+
+@pytest.mark.parametrize('coin_space', ['diagonal', 'lattice'])
+def test_parallel_and_out_of_core_steps_match_step(coin_space, tmp_path):
+    serial = _configure(MultiDimensionalQuantumWalk(2, 7, (3, 2), coin_space=coin_space))
+    parallel = _configure(MultiDimensionalQuantumWalk(2, 7, (3, 2), coin_space=coin_space))
+    streamed = _configure(MultiDimensionalQuantumWalk(2, 7, (3, 2), coin_space=coin_space, memmap_dir=str(tmp_path)))
+    # Blocks of two rows, so the last block is shorter and halos wrap around
+    streamed.block_bytes = 2 * 7 * streamed.coin_dimension * streamed.position_states.itemsize
+    for _ in range(6):
+        serial.step()
+        streamed.step()
+    parallel.parallel_step(6, workers=3)
+    np.testing.assert_allclose(parallel.position_states, serial.position_states, atol=1e-12)
+    np.testing.assert_allclose(streamed.position_states, serial.position_states, atol=1e-12)
+
+def test_field_generators_are_evaluated_on_every_set_call():
+    walk = MultiDimensionalQuantumWalk(2, 5, (2, 2))
+    rng = np.random.default_rng(0)
+    disorder = lambda coordinates: rng.uniform(0, 1, walk.grid_shape)
+    walk.set_potential(disorder)
+    first = walk.potential_phases
+    walk.set_potential(disorder)
+    assert not np.allclose(walk.potential_phases, first)
+
+    strength = 1.0
+    ramp = lambda position: strength * position[0]
+    walk.set_potential(ramp)
+    strength = 0.0
+    walk.set_potential(ramp)
+    np.testing.assert_allclose(walk.potential_phases, 1)
+
+@pytest.mark.parametrize('dimensions, size, steps', [(1, 7, 2), (2, 5, 3), (2, 6, 4)])
+def test_multi_particle_interference_matches_pair_loop(dimensions, size, steps):
+    walk = MultiDimensionalQuantumWalk(dimensions, size, (2,) * dimensions)
+    for _ in range(steps):
+        walk.step()
+    walk.position_states += 0.01 * np.exp(0.3j * np.arange(walk.position_states.size)).reshape(walk.position_states.shape)
+    phases = np.angle(walk.position_states)
+    expected = walk.position_states.copy()
+    sites = list(np.ndindex(*walk.grid_shape))
+    for site in sites:
+        others = [np.cos(phases[(0,) + site] - phases[(1,) + other]) for other in sites if other != site]
+        expected[(slice(None),) + site] *= np.mean(others)
+    walk.multi_particle_interference_simulation()
+    np.testing.assert_allclose(walk.position_states, expected, atol=1e-12)
+
+@pytest.mark.parametrize('boundary, pad_mode', [('periodic', 'wrap'), ('reflective', 'edge'), ('absorbing', 'constant')])
+def test_neighbor_sum_matches_padded_sum(boundary, pad_mode):
+    from quantumsimulationlib.utils import neighbor_sum
+    array = np.random.default_rng(6).standard_normal((3, 5, 4))
+    padded = np.pad(array, [(0, 0), (1, 1), (1, 1)], mode=pad_mode)
+    expected = padded[:, :-2, 1:-1] + padded[:, 2:, 1:-1] + padded[:, 1:-1, :-2] + padded[:, 1:-1, 2:]
+    np.testing.assert_allclose(neighbor_sum(array, boundary, axes=(1, 2)), expected)
+
+def test_quantum_fourier_transform_matches_dft_matrices():
+    from scipy.linalg import dft
+    walk = MultiDimensionalQuantumWalk(2, 6, (1, 4))
+    walk.step()
+    state = walk.position_states.copy()
+    walk.apply_quantum_fourier_transform()
+    matrix = dft(6, scale='sqrtn')
+    np.testing.assert_allclose(walk.position_states, np.einsum('ax,by,kxy->kab', matrix, matrix, state), atol=1e-12)
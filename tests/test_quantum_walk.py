@@ -8,4 +8,193 @@ def test_initial_state():
     qw = QuantumWalk(num_positions)
     assert qw.position_state[0] == 1
     assert all(qw.position_state[1:] == 0)
-"""
\ No newline at end of file
+"""
+import numpy as np
+import pytest
+from quantumsimulationlib import QuantumWalk
+from quantumsimulationlib.continuous_time import continuous_time_evolve
+
+@pytest.mark.parametrize('boundary', ['periodic', 'reflective'])
+@pytest.mark.parametrize('rate', [0, 0.02])
+def test_fused_step_matches_step(boundary, rate):
+    plain = QuantumWalk(32, 5, seed=7)
+    fused = QuantumWalk(32, 5, seed=7)
+    plain.decoherence_rate = fused.decoherence_rate = rate
+    for _ in range(40):
+        plain.step(boundary=boundary)
+        fused.step(boundary=boundary, fused=True)
+    np.testing.assert_allclose(fused.position_state, plain.position_state, atol=1e-12)
+
+@pytest.mark.parametrize('rate', [0, 0.02])
+def test_lazy_shifts_match_eager_steps(rate):
+    eager = QuantumWalk(30, 4, seed=5)
+    lazy = QuantumWalk(30, 4, seed=5)
+    eager.decoherence_rate = lazy.decoherence_rate = rate
+    for _ in range(45):
+        eager.step()
+        lazy.step(lazy=True)
+    np.testing.assert_allclose(lazy.measure(), eager.measure(), atol=1e-12)
+    np.testing.assert_allclose(lazy.position_state, eager.position_state, atol=1e-12)
+
+@pytest.mark.parametrize('model', ['gaussian', 'phase', 'amplitude'])
+def test_lazy_noise_is_drawn_per_lattice_site(model):
+    eager = QuantumWalk(12, 3, seed=9)
+    lazy = QuantumWalk(12, 3, seed=9)
+    for _ in range(5):
+        eager.apply_coin()
+        eager.shift()
+        lazy.apply_coin()
+        lazy.shift(lazy=True)
+    eager.apply_decoherence(0.1, model)
+    lazy.apply_decoherence(0.1, model)
+    np.testing.assert_allclose(lazy.position_state, eager.position_state, atol=1e-12)
+
+def test_evolve_to_matches_repeated_steps():
+    stepped = QuantumWalk(64, 20)
+    jumped = QuantumWalk(64, 20)
+    stepped.decoherence_rate = 0
+    for _ in range(25):
+        stepped.step()
+    jumped.evolve_to(25)
+    np.testing.assert_allclose(jumped.position_state, stepped.position_state, atol=1e-10)
+    assert jumped.steps_taken == 25
+
+@pytest.mark.parametrize('boundary', ['periodic', 'reflective'])
+def test_active_window_with_zero_epsilon_matches_full_steps(boundary):
+    full = QuantumWalk(80, 40)
+    windowed = QuantumWalk(80, 40)
+    full.decoherence_rate = windowed.decoherence_rate = 0
+    windowed.enable_active_window(epsilon=0)
+    for _ in range(30):
+        full.step(boundary=boundary)
+        windowed.step(boundary=boundary)
+    np.testing.assert_allclose(windowed.position_state, full.position_state, atol=1e-12)
+
+def test_active_window_follows_evolve_to():
+    full = QuantumWalk(120, 60)
+    windowed = QuantumWalk(120, 60)
+    full.decoherence_rate = windowed.decoherence_rate = 0
+    windowed.enable_active_window(epsilon=0)
+    for walk in (full, windowed):
+        walk.step()
+        walk.evolve_to(20)
+        walk.step()
+    np.testing.assert_allclose(windowed.position_state, full.position_state, atol=1e-12)
+
+    windowed.decoherence_rate = 0.02
+    windowed.step()
+    assert np.isclose(np.sum(windowed.measure()), 1)
+
+def test_chebyshev_evolution_matches_expm():
+    from scipy.linalg import expm
+    rng = np.random.default_rng(3)
+    hamiltonian = rng.standard_normal((24, 24))
+    hamiltonian = hamiltonian + hamiltonian.T
+    state = rng.standard_normal(24) + 1j * rng.standard_normal(24)
+    state /= np.linalg.norm(state)
+    for time in (0.1, 2.5):
+        expected = expm(-1j * hamiltonian * time) @ state
+        np.testing.assert_allclose(continuous_time_evolve(hamiltonian, state, time), expected, atol=1e-9)
+
+def test_complex64_state_is_kept():
+    walk = QuantumWalk(32, 10, dtype=np.complex64)
+    walk.step()
+    walk.step(fused=True)
+    walk.step(lazy=True)
+    assert walk.position_state.dtype == np.complex64
+    walk.evolve_to(10)
+    assert walk.position_state.dtype == np.complex64
+    assert np.isclose(np.sum(walk.measure()), 1, atol=1e-5)
+    ring = np.roll(np.eye(32), 1, axis=1) + np.roll(np.eye(32), -1, axis=1)
+    for method in ('chebyshev', 'spectral'):
+        walk.continuous_time_step(ring, 0.1, method)
+        assert walk.position_state.dtype == np.complex64
+    walk.set_graph(ring)
+    walk.continuous_time_quantum_walk()
+    assert walk.position_state.dtype == np.complex64
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_complex64_norm_does_not_drift_without_noise(lazy):
+    walk = QuantumWalk(64, 32, dtype=np.complex64)
+    walk.decoherence_rate = 0
+    assert walk.renormalize_interval == 64
+    for _ in range(10000):
+        walk.step(lazy=lazy)
+    assert abs(np.sum(walk.measure(), dtype=np.float64) - 1) < 1e-5
+
+def test_oracle_predicates_are_recompiled_unless_cached():
+    walk = QuantumWalk(8, 0)
+    walk.position_state[0] = 1
+    marked = {2}
+    predicate = lambda position: position in marked
+    walk.apply_oracle(predicate)
+    marked.add(5)
+    walk.apply_oracle(predicate)
+    np.testing.assert_array_equal(walk.position_state[0].real, [1, 1, 1, 1, 1, -1, 1, 1])
+
+    # The cached mask still marks 2 and 5 after the set is cleared, so the second call undoes the first
+    before = walk.position_state.copy()
+    walk.apply_oracle(predicate, cache=True)
+    marked.clear()
+    walk.apply_oracle(predicate, cache=True)
+    np.testing.assert_array_equal(walk.position_state, before)
+
+def test_spectral_cache_hits_misses_and_eviction():
+    from scipy import sparse
+    from scipy.linalg import expm
+    from quantumsimulationlib import SpectralCache
+    ring = np.roll(np.eye(8), 1, axis=1) + np.roll(np.eye(8), -1, axis=1)
+    path = np.diag(np.ones(7), 1) + np.diag(np.ones(7), -1)
+    # Room for exactly one 8-node decomposition
+    cache = SpectralCache(max_bytes=8 * 8 + 8 * 8 * 8)
+    np.testing.assert_allclose(cache.propagator(ring, 0.7), expm(-0.7j * ring), atol=1e-12)
+    cache.propagator(sparse.csr_matrix(ring), 0.2)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+    cache.evolve(path, np.eye(8)[0], 1.0)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 1)
+    cache.decomposition(ring)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+def test_quantum_fourier_transform_matches_dft_matrix():
+    from scipy.linalg import dft
+    walk = QuantumWalk(12, 3)
+    for _ in range(4):
+        walk.step()
+    state = walk.position_state.copy()
+    walk.apply_quantum_fourier_transform()
+    np.testing.assert_allclose(walk.position_state, state @ dft(12, scale='sqrtn').T, atol=1e-12)
+    walk.apply_quantum_fourier_transform(inverse=True)
+    np.testing.assert_allclose(walk.position_state, state, atol=1e-12)
+
+def test_coin_observables_match_explicit_density_matrix():
+    from quantumsimulationlib.observables import coin_density_matrix, coin_entanglement_entropy, coin_purity
+    walk = QuantumWalk(10, 4, seed=2)
+    for _ in range(5):
+        walk.step()
+    psi = walk.position_state.reshape(-1)
+    full = np.outer(psi, psi.conj()).reshape(2, 10, 2, 10)
+    coin = np.einsum('ixjx->ij', full)
+    position = np.einsum('ixiy->xy', full)
+    eigenvalues = np.linalg.eigvalsh(position)
+    eigenvalues = eigenvalues[eigenvalues > 1e-14]
+    np.testing.assert_allclose(coin_density_matrix(walk), coin, atol=1e-12)
+    assert coin_entanglement_entropy(walk) == pytest.approx(-np.sum(eigenvalues * np.log(eigenvalues)), abs=1e-9)
+    assert coin_purity(walk) == pytest.approx(np.trace(coin @ coin).real)
+
+def test_coin_field_and_callable_coin_match_scalar_coin():
+    from quantumsimulationlib.coins import apply_coin_field, coin_matrix
+    fourier = coin_matrix('Fourier')
+    reference = QuantumWalk(16, 8, coin_type='Fourier', seed=0)
+    field = QuantumWalk(16, 8, coin_operation=np.broadcast_to(fourier, (16, 2, 2)).copy(), seed=0)
+    function = QuantumWalk(16, 8, coin_operation=lambda coin_state: fourier @ coin_state, seed=0)
+    for walk in (reference, field, function):
+        for _ in range(6):
+            walk.step()
+    np.testing.assert_allclose(field.position_state, reference.position_state, atol=1e-12)
+    np.testing.assert_allclose(function.position_state, reference.position_state, atol=1e-12)
+
+    rng = np.random.default_rng(1)
+    coins = np.linalg.qr(rng.standard_normal((5, 2, 2)) + 1j * rng.standard_normal((5, 2, 2)))[0]
+    state = rng.standard_normal((2, 5)) + 1j * rng.standard_normal((2, 5))
+    expected = np.stack([coins[x] @ state[:, x] for x in range(5)], axis=1)
+    np.testing.assert_allclose(apply_coin_field(coins, state), expected, atol=1e-12)
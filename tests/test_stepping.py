@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from quantumsimulationlib import EntangledQuantumWalk, QuantumWalkBatch, QuantumWalkOnNetwork
+
+@pytest.mark.parametrize('walker', [
+    lambda: QuantumWalkOnNetwork(20, 'small_world', seed=1),
+    lambda: QuantumWalkOnNetwork(30, 'random', seed=2),
+    lambda: EntangledQuantumWalk(10, 2, seed=3),
+    lambda: EntangledQuantumWalk(6, 2, dimension=2, seed=3),
+    lambda: EntangledQuantumWalk(12, 3, topology='network', seed=4),
+])
+def test_iter_steps_runs_every_walker(walker):
+    walker = walker()
+    records = list(walker.iter_steps(5, 2, ('probability', 'mean', 'entropy')))
+    assert [record['step'] for record in records] == [2, 4, 5]
+    assert records[-1]['probability'].shape == walker.position_states.shape[1:]
+    assert np.all(np.isfinite(records[-1]['probability']))
+
+def test_entangled_coin_acts_on_every_particle():
+    walker = EntangledQuantumWalk(5, 2)
+    before = walker.position_states.copy()
+    walker.apply_coin()
+    hadamard = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
+    expected = (np.kron(hadamard, hadamard) @ before.reshape(4, -1)).reshape(before.shape)
+    np.testing.assert_allclose(walker.position_states, expected, atol=1e-12)
+
+def test_batch_observables_are_per_walker():
+    batch = QuantumWalkBatch(16, [2, 9], seed=0)
+    record = list(batch.iter_steps(3, observables=('mean', 'variance')))[-1]
+    assert record['mean'].shape == (2,)
+    assert record['variance'].shape == (2,)
+
+def test_batch_search_matches_separate_walks():
+    from quantumsimulationlib import QuantumWalk
+    targets, boundaries = [3, 11], ['periodic', 'reflective']
+    batch = QuantumWalkBatch(16, [0, 0], boundaries=boundaries, decoherence_rates=0)
+    batch.prepare_uniform_superposition()
+    result = batch.search(targets, max_steps=12)
+    for walker, (target, boundary) in enumerate(zip(targets, boundaries)):
+        walk = QuantumWalk(16, 0)
+        walk.position_state = np.full((2, 16), 1 / np.sqrt(32), dtype=complex)
+        trace = [walk.measure()[target]]
+        for _ in range(12):
+            walk.apply_coin()
+            walk.shift(boundary)
+            walk.position_state[:, target] *= -1
+            walk.apply_coin()
+            walk.shift(boundary)
+            trace.append(walk.measure()[target])
+        expected = np.array(trace)
+        computed = result['success_probabilities'][:, walker]
+        stopped = np.isnan(computed)
+        np.testing.assert_allclose(computed[~stopped], expected[~stopped], atol=1e-12)
+        assert expected[result['hitting_times'][walker]] == pytest.approx(np.max(expected[~stopped]))
+    assert result['reached_peak'].tolist() == [False, True]
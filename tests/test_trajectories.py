@@ -0,0 +1,15 @@
+import numpy as np
+from quantumsimulationlib import QuantumWalk, TrajectoryEnsemble
+
+def test_statistics_do_not_depend_on_chunks_or_workers():
+    walk = QuantumWalk(24, 12)
+    reference = TrajectoryEnsemble.from_walk(walk, chunk_size=16, seed=11).run(20, 15)
+    rechunked = TrajectoryEnsemble.from_walk(walk, chunk_size=3, seed=11).run(20, 15)
+    pooled = TrajectoryEnsemble.from_walk(walk, chunk_size=5, seed=11).run(20, 15, workers=2)
+    for statistics in (rechunked, pooled):
+        np.testing.assert_allclose(statistics['mean'], reference['mean'], atol=1e-12)
+        np.testing.assert_allclose(statistics['variance'], reference['variance'], atol=1e-12)
+
+def test_complex64_trajectories_stay_single_precision():
+    ensemble = TrajectoryEnsemble(QuantumWalk(16, 8, dtype=np.complex64).position_state, seed=1)
+    assert ensemble.replay(0, 5).dtype == np.complex64